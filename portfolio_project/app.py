@@ -6,6 +6,7 @@ from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
 from werkzeug.middleware.proxy_fix import ProxyFix
 from sqlalchemy.orm import DeclarativeBase
+from replica import RoutingSession
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -14,32 +15,137 @@ class Base(DeclarativeBase):
     pass
 
 # Initialize extensions
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 login_manager = LoginManager()
 csrf = CSRFProtect()
 
-def create_app():
+def create_app(config=None):
+    """
+    Application factory. Nothing touches the database here: schema creation
+    and seeding live in the `flask init-db` command (see commands.py)
+    """
+    # Deferred imports keep `import app` cheap for workers, tests and the CLI
+    from compression import Compress
+    from instrumentation import Instrumentation
+    from metrics import Metrics
+    from streaming import Streaming
+    from fragments import FragmentCache
+    from database import SQLiteTuning, engine_options
+    from replica import REPLICA_BIND, ReadReplica, pool_options
+    from throttle import login_throttle
+    from routes import bp as main_bp
+    from webhooks import bp as webhooks_bp, replay_webhook_command
+    from commands import register_commands
+    from popularity import view_counter
+    
     app = Flask(__name__)
     
     # Configuration
     app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
     app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///portfolio.db")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-        "pool_recycle": 300,
-        "pool_pre_ping": True,
-    }
     app.config["UPLOAD_FOLDER"] = "uploads"
     app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max file size
     
+    # Response compression (disable when a front proxy already compresses)
+    app.config["COMPRESS_ENABLED"] = os.environ.get("COMPRESS_ENABLED", "true").lower() == "true"
+    app.config["COMPRESS_MIN_SIZE"] = int(os.environ.get("COMPRESS_MIN_SIZE", 500))
+    
+    # Per-request instrumentation (Server-Timing, structured logs, sampled profiles)
+    app.config["SERVER_TIMING_HEADER"] = os.environ.get("SERVER_TIMING_HEADER", "true").lower() == "true"
+    app.config["PROFILE_SAMPLE_RATE"] = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+    app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR", "profiles")
+    
+    # Prometheus metrics (set PROMETHEUS_MULTIPROC_DIR under gunicorn)
+    app.config["METRICS_ENABLED"] = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+    app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN")
+    
+    # GitHub webhook (push-based cache invalidation); disabled when unset
+    app.config["GITHUB_WEBHOOK_SECRET"] = os.environ.get("GITHUB_WEBHOOK_SECRET")
+    
+    # Write-behind view counters (seconds between batched flushes)
+    app.config["VIEW_FLUSH_INTERVAL"] = int(os.environ.get("VIEW_FLUSH_INTERVAL", 30))
+    
+    # Opt-in streamed HTML for the slow public pages (index, project detail)
+    app.config["STREAM_TEMPLATES"] = os.environ.get("STREAM_TEMPLATES", "false").lower() == "true"
+    
+    # Template fragment cache ({% cache %}) and on-disk Jinja bytecode cache
+    app.config["FRAGMENT_CACHE_ENABLED"] = os.environ.get("FRAGMENT_CACHE_ENABLED", "true").lower() == "true"
+    app.config["FRAGMENT_CACHE_TTL"] = int(os.environ.get("FRAGMENT_CACHE_TTL", 3600))
+    app.config["JINJA_BYTECODE_CACHE_DIR"] = os.environ.get("JINJA_BYTECODE_CACHE_DIR", os.path.join("instance", "jinja_cache"))
+    
+    # Optional read replica for public GET routes (see replica.py)
+    app.config["DATABASE_REPLICA_URL"] = os.environ.get("DATABASE_REPLICA_URL")
+    app.config["REPLICA_STICKY_SECONDS"] = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+    
+    # Connection pool per role (DB_PRIMARY_POOL_SIZE, DB_REPLICA_MAX_OVERFLOW, ...).
+    # Pools are per worker process: total connections = workers x (size + overflow)
+    for role in ("PRIMARY", "REPLICA"):
+        for key in ("POOL_SIZE", "MAX_OVERFLOW", "POOL_TIMEOUT"):
+            name = f"DB_{role}_{key}"
+            app.config[name] = int(os.environ[name]) if name in os.environ else None
+    
+    # SQLite mode (WAL, busy timeout, single writer); ignored on Postgres
+    app.config["SQLITE_WAL"] = os.environ.get("SQLITE_WAL", "true").lower() == "true"
+    app.config["SQLITE_BUSY_TIMEOUT"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+    app.config["SQLITE_SYNCHRONOUS"] = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    app.config["SQLITE_MMAP_SIZE"] = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    
+    # Login/register throttling (per-IP and per-account sliding windows)
+    app.config["LOGIN_THROTTLE_STORE"] = os.environ.get("LOGIN_THROTTLE_STORE", "memory")  # or "sqlite"
+    app.config["LOGIN_IP_LIMIT"] = int(os.environ.get("LOGIN_IP_LIMIT", 20))
+    app.config["LOGIN_IP_WINDOW"] = int(os.environ.get("LOGIN_IP_WINDOW", 300))
+    app.config["LOGIN_ACCOUNT_LIMIT"] = int(os.environ.get("LOGIN_ACCOUNT_LIMIT", 5))
+    app.config["LOGIN_ACCOUNT_WINDOW"] = int(os.environ.get("LOGIN_ACCOUNT_WINDOW", 900))
+    
+    # Password hash algorithm/cost in Werkzeug format; old hashes are upgraded on login
+    app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD")
+    
+    # Background job queue; enable only when a `flask jobs worker` process runs
+    app.config["JOBS_ENABLED"] = os.environ.get("JOBS_ENABLED", "false").lower() == "true"
+    app.config["JOB_POLL_INTERVAL"] = float(os.environ.get("JOB_POLL_INTERVAL", 1))
+    app.config["JOB_VISIBILITY_TIMEOUT"] = int(os.environ.get("JOB_VISIBILITY_TIMEOUT", 300))
+    
+    # Notification retention (`flask notifications prune`): read notifications
+    # older than this are rolled up into monthly counts and deleted in batches
+    app.config["NOTIFICATION_RETENTION_DAYS"] = int(os.environ.get("NOTIFICATION_RETENTION_DAYS", 90))
+    app.config["NOTIFICATION_RETENTION_BATCH"] = int(os.environ.get("NOTIFICATION_RETENTION_BATCH", 500))
+    app.config["NOTIFICATION_RETENTION_PAUSE"] = float(os.environ.get("NOTIFICATION_RETENTION_PAUSE", 0.05))
+    
+    if config:
+        app.config.update(config)
+    
+    # Engine options depend on the backend (SQLite has no server to ping)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {
+        **engine_options(app.config["SQLALCHEMY_DATABASE_URI"], app.config),
+        **pool_options(app.config, "PRIMARY"),
+    })
+    replica_url = app.config["DATABASE_REPLICA_URL"]
+    if replica_url:
+        app.config.setdefault("SQLALCHEMY_BINDS", {REPLICA_BIND: {
+            "url": replica_url,
+            **engine_options(replica_url, app.config),
+            **pool_options(app.config, "REPLICA"),
+        }})
+    
     # Proxy fix for deployment
-    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    # x_for: login throttling keys on the client IP, not the proxy's
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
     
     # Initialize extensions
     db.init_app(app)
+    SQLiteTuning(app)
+    ReadReplica(app)
+    login_throttle.init_app(app)
     csrf.init_app(app)
     login_manager.init_app(app)
-    login_manager.login_view = 'login'
+    Compress(app)
+    Instrumentation(app)
+    Metrics(app)
+    Streaming(app)
+    FragmentCache(app)
+    view_counter.init_app(app)
+    login_manager.login_view = 'main.login'
     login_manager.login_message = 'Por favor, faça login para acessar esta página.'
     login_manager.login_message_category = 'info'
     
@@ -49,7 +155,7 @@ def create_app():
         """Convert newlines to HTML line breaks"""
         if text is None:
             return ''
-        return text.replace('\n', '<br>\n')
+        return str(text).replace('\n', '<br>\n')
     
     # Add template context processors
     @app.context_processor
@@ -57,53 +163,19 @@ def create_app():
         from flask_wtf.csrf import generate_csrf
         return dict(csrf_token=generate_csrf)
     
+    # Routes and CLI commands
+    app.register_blueprint(main_bp)
+    app.register_blueprint(webhooks_bp)
+    register_commands(app)
+    app.cli.add_command(replay_webhook_command)
+    
     # Create upload directory
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
     
     return app
 
-app = create_app()
-
 # User loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    from models import User
-    return User.query.get(int(user_id))
-
-# Create tables and initialize data
-with app.app_context():
-    import models  # noqa: F401
-    db.create_all()
-    logging.info("Database tables created")
-    
-    # Create admin user if no users exist
-    from models import User, Category
-    if User.query.count() == 0:
-        admin_user = User(
-            username='edgar',
-            email='edgar@portfolio.com',
-            first_name='Edgar',
-            last_name='Gomes',
-            is_admin=True,
-            bio='Desenvolvedor Full Stack apaixonado por tecnologia e inovação',
-            linkedin_url='https://www.linkedin.com/in/edgar-gomes234',
-            github_url='https://github.com/EdGomes234'
-        )
-        admin_user.set_password('admin123')
-        db.session.add(admin_user)
-        
-        # Create default categories
-        default_categories = [
-            {'name': 'Desenvolvimento Web', 'color': '#FF6B35'},
-            {'name': 'Mobile', 'color': '#28A745'},
-            {'name': 'Desktop', 'color': '#007BFF'},
-            {'name': 'Machine Learning', 'color': '#6F42C1'},
-            {'name': 'DevOps', 'color': '#DC3545'}
-        ]
-        
-        for cat_data in default_categories:
-            category = Category(name=cat_data['name'], color=cat_data['color'])
-            db.session.add(category)
-        
-        db.session.commit()
-        logging.info("Admin user and default categories created")
+    from user_cache import load_user_snapshot
+    return load_user_snapshot(user_id)
@@ -0,0 +1,90 @@
+"""
+Mede o throughput da fila de jobs: enfileiramento (jobs/s em um commit por
+job, como nas requisições) e processamento com N workers concorrentes.
+
+Por padrão usa um SQLite temporário; passe DATABASE_URL para medir contra
+o Postgres de produção (as tabelas precisam existir: `flask init-db`).
+
+Uso:
+    python benchmarks/job_queue.py [--jobs 2000] [--workers 1 2 4]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+def setup_app():
+    from app import create_app, db
+    from jobs import task
+
+    @task('benchmark_noop')
+    def benchmark_noop(n):
+        pass
+
+    app = create_app({'JOBS_ENABLED': True, 'JOB_POLL_INTERVAL': 0.05})
+    with app.app_context():
+        import models  # noqa: F401
+        db.create_all()
+    return app
+
+def enqueue_jobs(app, count):
+    from app import db
+    from jobs import enqueue
+    from models import Job
+
+    with app.app_context():
+        Job.query.filter_by(task='benchmark_noop').delete()
+        db.session.commit()
+        started = time.perf_counter()
+        for n in range(count):
+            enqueue('benchmark_noop', n=n)
+            db.session.commit()
+        return time.perf_counter() - started
+
+def run_worker(app):
+    from jobs import work
+    with app.app_context():
+        work(burst=True)
+
+def process_jobs(app, workers):
+    started = time.perf_counter()
+    processes = [multiprocessing.Process(target=run_worker, args=(app,)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return time.perf_counter() - started
+
+def count_done(app):
+    from models import Job
+    with app.app_context():
+        return Job.query.filter_by(task='benchmark_noop', status='done').count()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    if 'DATABASE_URL' not in os.environ:
+        os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp()}/jobs-benchmark.db"
+    multiprocessing.set_start_method('fork')
+    app = setup_app()
+
+    for workers in args.workers:
+        enqueue_time = enqueue_jobs(app, args.jobs)
+        with app.app_context():
+            from app import db
+            db.engine.dispose()  # os workers não herdam conexões abertas
+        process_time = process_jobs(app, workers)
+        done = count_done(app)
+        print(f"workers {workers:<3} enfileirar {args.jobs / enqueue_time:8.1f} jobs/s   "
+              f"processar {done / process_time:8.1f} jobs/s   concluídos {done}/{args.jobs}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Teste de carga simples contra um servidor em execução.
+
+Útil para validar a configuração do gunicorn: com workers sync, uma rota
+lenta (ex.: busca no GitHub) derruba o throughput das outras; com gthread
+ou gevent as demais rotas continuam respondendo.
+
+Uso:
+    gunicorn -c gunicorn.conf.py main:app &
+    python benchmarks/loadtest.py http://localhost:5000/ http://localhost:5000/login \\
+        --concurrency 20 --duration 30
+"""
+import argparse
+import itertools
+import statistics
+import threading
+import time
+import requests
+
+def worker(urls, deadline, latencies, errors, lock):
+    session = requests.Session()
+    for url in itertools.cycle(urls):
+        if time.perf_counter() >= deadline:
+            return
+        started = time.perf_counter()
+        try:
+            response = session.get(url, timeout=60)
+            ok = response.status_code < 500
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors.append(url)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos')
+    args = parser.parse_args()
+
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(args.urls, deadline, latencies, errors, lock))
+        for _ in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    total = len(latencies) + len(errors)
+    print(f"requisições {total}   erros {len(errors)}   {total / wall:.1f} req/s")
+    if latencies:
+        print(f"latência p50 {percentile(latencies, 50) * 1000:.1f} ms   "
+              f"p95 {percentile(latencies, 95) * 1000:.1f} ms   "
+              f"p99 {percentile(latencies, 99) * 1000:.1f} ms   "
+              f"média {statistics.mean(latencies) * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
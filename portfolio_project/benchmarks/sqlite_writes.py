@@ -0,0 +1,105 @@
+"""
+Escritas concorrentes no SQLite, como curtidas e comentários chegando em
+vários workers do gunicorn ao mesmo tempo.
+
+Cada processo simula um worker com várias threads; cada escrita insere um
+comentário e atualiza a popularidade do projeto, em uma transação, como em
+add_comment(). Compare com --baseline (sem WAL, pragmas nem fila de escrita).
+
+Uso:
+    python benchmarks/sqlite_writes.py [--processes 4] [--threads 4] [--duration 10]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+def make_app(baseline):
+    from app import create_app
+    return create_app({'SQLITE_TUNING': not baseline})
+
+def setup(baseline):
+    from app import db
+    from models import User, Project
+
+    app = make_app(baseline)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', first_name='B', last_name='B')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Project(title='Bench', description='Bench', user_id=user.id))
+        db.session.commit()
+
+def writer_thread(app, deadline, counts, lock):
+    from app import db
+    from models import Comment, Project
+    from popularity import COMMENT_WEIGHT, add_event
+
+    ok = errors = 0
+    while time.perf_counter() < deadline:
+        with app.app_context():
+            try:
+                project = db.session.get(Project, 1)
+                db.session.add(Comment(content='bench', user_id=project.user_id, project_id=project.id))
+                project.popularity_score = add_event(project.popularity_score, COMMENT_WEIGHT)
+                db.session.commit()
+                ok += 1
+            except Exception:
+                db.session.rollback()
+                errors += 1
+    with lock:
+        counts['ok'] += ok
+        counts['errors'] += errors
+
+def run_process(baseline, threads, duration, results):
+    import logging
+    logging.disable(logging.CRITICAL)
+    app = make_app(baseline)
+    counts, lock = {'ok': 0, 'errors': 0}, threading.Lock()
+    deadline = time.perf_counter() + duration
+    workers = [threading.Thread(target=writer_thread, args=(app, deadline, counts, lock)) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put(counts)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos')
+    parser.add_argument('--baseline', action='store_true', help='SQLite sem ajustes, para comparação')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp()}/writes-benchmark.db"
+    import logging
+    logging.disable(logging.CRITICAL)
+    multiprocessing.set_start_method('spawn')
+    setup(args.baseline)
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=run_process, args=(args.baseline, args.threads, args.duration, results))
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    totals = {'ok': 0, 'errors': 0}
+    for _ in processes:
+        for key, value in results.get().items():
+            totals[key] += value
+    for process in processes:
+        process.join()
+
+    print(f"{'baseline' if args.baseline else 'ajustado'}: {totals['ok'] / args.duration:.0f} escritas/s   "
+          f"erros (database is locked) {totals['errors']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Mede o tempo de inicialização: `import app` e `create_app()`.
+
+Cada medição roda em um processo novo para não aproveitar módulos já
+carregados, como acontece no boot de um worker do gunicorn.
+
+Uso:
+    python benchmarks/startup.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app()
+t2 = time.perf_counter()
+print(json.dumps({'import_app': t1 - t0, 'create_app': t2 - t1, 'total': t2 - t0}))
+"""
+
+def measure_once():
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    for key in ('import_app', 'create_app', 'total'):
+        values = [s[key] * 1000 for s in samples]
+        print(f"{key:<12} median {statistics.median(values):8.1f} ms   "
+              f"min {min(values):8.1f} ms   max {max(values):8.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,500 @@
+import os
+import csv
+import json
+import time
+import random
+from datetime import datetime
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import click
+import sqlalchemy as sa
+from flask.cli import AppGroup
+from app import db
+from models import User, Category, Project, Tag, Comment, Like, project_tags
+from popularity import add_event, CREATED_WEIGHT, COMMENT_WEIGHT, LIKE_WEIGHT
+from reference_data import invalidate_categories, invalidate_tags
+from rendering import content_hash, render_markdown
+
+# Importação e exportação em massa. Registros usam chaves naturais (nome de
+# usuário, nome da categoria/tag) para poderem migrar entre bancos; projetos
+# mantêm o id para que comentários e curtidas continuem apontando para eles.
+# Tudo é processado em blocos: a memória não cresce com o tamanho do arquivo
+
+FIELDS = {
+    'categories': ['name', 'color'],
+    'tags': ['name'],
+    'projects': ['id', 'title', 'description', 'content', 'image_path', 'video_path',
+                 'demo_link', 'github_link', 'is_published', 'is_featured', 'view_count',
+                 'created_at', 'updated_at', 'author', 'category', 'tags'],
+    'comments': ['project_id', 'author', 'content', 'created_at'],
+    'likes': ['project_id', 'author', 'created_at'],
+}
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def detect_format(filename: str, fmt: str = None) -> str:
+    if fmt:
+        return fmt
+    return 'csv' if filename.lower().endswith('.csv') else 'jsonl'
+
+# --- Leitura e escrita -----------------------------------------------------
+
+def read_records(file, fmt: str):
+    """
+    Lê registros de um arquivo JSON Lines ou CSV, um de cada vez
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+def _to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return ','.join(value)
+    return value
+
+def write_records(file, fmt: str, kind: str, records) -> int:
+    """
+    Grava registros conforme chegam. Retorna quantos foram gravados
+    """
+    fields = FIELDS[kind]
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+
+    count = 0
+    for record in records:
+        if writer:
+            writer.writerow({key: _to_text(record.get(key)) for key in fields})
+        else:
+            file.write(json.dumps(record, default=_to_text, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'sim')
+    return bool(value)
+
+def _parse_tags(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return list(dict.fromkeys(name.strip() for name in value if name and name.strip()))
+
+# --- Exportação ------------------------------------------------------------
+
+def _stream(statement, chunk_size):
+    result = db.session.execute(statement.execution_options(yield_per=chunk_size))
+    yield from result.mappings().partitions()
+
+def export_categories(chunk_size):
+    statement = sa.select(Category.name, Category.color).order_by(Category.id)
+    for rows in _stream(statement, chunk_size):
+        yield from (dict(row) for row in rows)
+
+def export_tags(chunk_size):
+    statement = sa.select(Tag.name).order_by(Tag.id)
+    for rows in _stream(statement, chunk_size):
+        yield from (dict(row) for row in rows)
+
+def export_projects(chunk_size):
+    columns = [getattr(Project, name) for name in FIELDS['projects'][:13]]
+    statement = (
+        sa.select(*columns, User.username.label('author'), Category.name.label('category'))
+        .join(User, Project.user_id == User.id)
+        .outerjoin(Category, Project.category_id == Category.id)
+        .order_by(Project.id)
+    )
+    # Cada bloco busca as tags de todos os seus projetos em uma consulta
+    for rows in _stream(statement, chunk_size):
+        ids = [row['id'] for row in rows]
+        tags = {}
+        for project_id, name in db.session.execute(
+            sa.select(project_tags.c.project_id, Tag.name)
+            .join(Tag, Tag.id == project_tags.c.tag_id)
+            .where(project_tags.c.project_id.in_(ids))
+        ):
+            tags.setdefault(project_id, []).append(name)
+        for row in rows:
+            yield dict(row, tags=tags.get(row['id'], []))
+
+def export_comments(chunk_size):
+    statement = (
+        sa.select(Comment.project_id, User.username.label('author'), Comment.content, Comment.created_at)
+        .join(User, Comment.user_id == User.id)
+        .order_by(Comment.id)
+    )
+    for rows in _stream(statement, chunk_size):
+        yield from (dict(row) for row in rows)
+
+def export_likes(chunk_size):
+    statement = (
+        sa.select(Like.project_id, User.username.label('author'), Like.created_at)
+        .join(User, Like.user_id == User.id)
+        .order_by(Like.id)
+    )
+    for rows in _stream(statement, chunk_size):
+        yield from (dict(row) for row in rows)
+
+EXPORTERS = {
+    'categories': export_categories,
+    'tags': export_tags,
+    'projects': export_projects,
+    'comments': export_comments,
+    'likes': export_likes,
+}
+
+# --- Importação ------------------------------------------------------------
+
+class Resolver:
+    """
+    Traduz nomes em ids consultando o banco uma vez por bloco, só para os
+    nomes ainda desconhecidos. Guarda apenas usuários, categorias e tags,
+    que são poucos perto de projetos e comentários.
+    `render` converte uma lista de textos Markdown (pode ser o map de um pool)
+    """
+
+    def __init__(self, render=map):
+        self.render = render
+        self.users = {}
+        self.categories = {}
+        self.tags = {}
+
+    def _load(self, known, column, id_column, names):
+        missing = {name for name in names if name and name not in known}
+        if missing:
+            known.update(db.session.execute(sa.select(column, id_column).where(column.in_(missing))).all())
+        return known
+
+    def user_ids(self, names):
+        return self._load(self.users, User.username, User.id, names)
+
+    def category_ids(self, names):
+        return self._load(self.categories, Category.name, Category.id, names)
+
+    def tag_ids(self, names):
+        """
+        Ids das tags, criando em lote as que não existem
+        """
+        self._load(self.tags, Tag.name, Tag.id, names)
+        missing = sorted({name for name in names if name not in self.tags})
+        if missing:
+            db.session.execute(sa.insert(Tag), [{'name': name} for name in missing])
+            self._load(self.tags, Tag.name, Tag.id, missing)
+            invalidate_tags()
+        return self.tags
+
+def _existing_project_ids(ids):
+    return set(db.session.scalars(sa.select(Project.id).where(Project.id.in_(ids))))
+
+def _existing_project_keys(keys):
+    """
+    Quais chaves (user_id, título) já existem, em uma consulta por bloco
+    """
+    if not keys:
+        return set()
+    return set(db.session.execute(
+        sa.select(Project.user_id, Project.title).where(
+            Project.user_id.in_({user_id for user_id, _ in keys}),
+            Project.title.in_({title for _, title in keys}),
+        )
+    ).all()) & keys
+
+def _add_popularity(events):
+    """
+    Aplica eventos (project_id, peso, data) em lote. Inserções em massa não
+    passam pelos eventos do ORM, então a pontuação é atualizada aqui
+    """
+    if not events:
+        return
+    table = Project.__table__
+    ids = {project_id for project_id, _, _ in events}
+    scores = dict(db.session.execute(sa.select(table.c.id, table.c.popularity_score).where(table.c.id.in_(ids))).all())
+    for project_id, weight, when in events:
+        scores[project_id] = add_event(scores[project_id], weight, when)
+    # updated_at = updated_at evita o onupdate: popularidade não é edição
+    db.session.execute(
+        sa.update(table)
+        .where(table.c.id == sa.bindparam('b_id'))
+        .values(popularity_score=sa.bindparam('b_score'), updated_at=table.c.updated_at),
+        [{'b_id': project_id, 'b_score': score} for project_id, score in scores.items()],
+    )
+
+def import_categories(records, resolver):
+    names = [record['name'] for record in records]
+    known = resolver.category_ids(names)
+    rows = {}
+    for record in records:
+        if record['name'] not in known:
+            rows[record['name']] = {'name': record['name'], 'color': record.get('color') or '#FF6B35'}
+    if rows:
+        db.session.execute(sa.insert(Category), list(rows.values()))
+        resolver.category_ids(list(rows))
+        invalidate_categories()
+    return len(rows)
+
+def import_tags(records, resolver):
+    names = _parse_tags([record['name'] for record in records])
+    before = len(resolver.tags)
+    resolver.tag_ids(names)
+    return len(resolver.tags) - before
+
+def import_projects(records, resolver):
+    users = resolver.user_ids([record.get('author') for record in records])
+    categories = resolver.category_ids([record.get('category') for record in records])
+    now = datetime.utcnow()
+
+    # Linhas com e sem id vão em inserts separados (executemany exige as
+    # mesmas colunas em todas as linhas)
+    # Ids que já estão no banco (importação repetida ou retomada depois de
+    # uma falha) são pulados, assim como ids repetidos dentro do arquivo.
+    # Registros sem id (ex.: `flask data generate`) são identificados pelo
+    # par (autor, título)
+    records = [record for record in records if users.get(record.get('author')) is not None]
+    seen = _existing_project_ids({int(record['id']) for record in records if record.get('id')})
+    seen_keys = _existing_project_keys({(users[record['author']], record['title'])
+                                        for record in records if not record.get('id')})
+    fresh = []
+    for record in records:
+        if record.get('id'):
+            key, known = int(record['id']), seen
+        else:
+            key, known = (users[record['author']], record['title']), seen_keys
+        if key in known:
+            continue
+        known.add(key)
+        fresh.append(record)
+    records = fresh
+
+    # Renderizar Markdown é o passo mais caro da importação: vai em lote,
+    # possivelmente em paralelo, e só para os registros que serão inseridos
+    contents = [record.get('content') or '' for record in records]
+    rendered = dict(zip(contents, resolver.render(render_markdown, contents)))
+
+    groups = {True: [], False: []}
+    for record in records:
+        user_id = users[record['author']]
+        content = record.get('content') or None
+        created_at = _parse_datetime(record.get('created_at')) or now
+        row = {
+            'title': record['title'],
+            'description': record['description'],
+            'content': content,
+            # Inserções em massa não disparam render_project_content nem
+            # init_project_popularity: calculamos os mesmos valores aqui
+            'content_html': rendered[content] if content else None,
+            'content_hash': content_hash(content) if content else None,
+            'image_path': record.get('image_path') or None,
+            'video_path': record.get('video_path') or None,
+            'demo_link': record.get('demo_link') or None,
+            'github_link': record.get('github_link') or None,
+            'is_published': _parse_bool(record.get('is_published')),
+            'is_featured': _parse_bool(record.get('is_featured')),
+            'view_count': int(record.get('view_count') or 0),
+            'popularity_score': add_event(None, CREATED_WEIGHT, created_at),
+            'created_at': created_at,
+            'updated_at': _parse_datetime(record.get('updated_at')) or created_at,
+            'user_id': user_id,
+            'category_id': categories.get(record.get('category')),
+        }
+        if record.get('id'):
+            row['id'] = int(record['id'])
+        groups['id' in row].append((row, _parse_tags(record.get('tags'))))
+
+    tag_ids = resolver.tag_ids({name for group in groups.values() for _, names in group for name in names})
+    links = []
+    for group in groups.values():
+        if not group:
+            continue
+        statement = sa.insert(Project).returning(Project.id, sort_by_parameter_order=True)
+        ids = db.session.scalars(statement, [row for row, _ in group]).all()
+        for project_id, (_, names) in zip(ids, group):
+            links.extend({'project_id': project_id, 'tag_id': tag_ids[name]} for name in names)
+    if links:
+        db.session.execute(sa.insert(project_tags), links)
+    return sum(len(group) for group in groups.values())
+
+def import_comments(records, resolver):
+    users = resolver.user_ids([record.get('author') for record in records])
+    projects = _existing_project_ids({int(record['project_id']) for record in records})
+    now = datetime.utcnow()
+
+    # Comentários não têm id no arquivo: (projeto, autor, data, texto) identifica
+    # os que já foram importados, para a importação poder ser repetida
+    dates = {_parse_datetime(record.get('created_at')) for record in records} - {None}
+    existing = set(db.session.execute(
+        sa.select(Comment.project_id, Comment.user_id, Comment.created_at, Comment.content)
+        .where(Comment.project_id.in_(projects), Comment.created_at.in_(dates))
+    ).all()) if projects and dates else set()
+
+    rows = []
+    for record in records:
+        user_id = users.get(record.get('author'))
+        project_id = int(record['project_id'])
+        if user_id is None or project_id not in projects:
+            continue
+        created_at = _parse_datetime(record.get('created_at')) or now
+        key = (project_id, user_id, created_at, record['content'])
+        if key in existing:
+            continue
+        existing.add(key)
+        rows.append({'content': record['content'], 'user_id': user_id, 'project_id': project_id,
+                     'created_at': created_at})
+    if rows:
+        db.session.execute(sa.insert(Comment), rows)
+        _add_popularity([(row['project_id'], COMMENT_WEIGHT, row['created_at']) for row in rows])
+    return len(rows)
+
+def import_likes(records, resolver):
+    users = resolver.user_ids([record.get('author') for record in records])
+    projects = _existing_project_ids({int(record['project_id']) for record in records})
+    existing = set(db.session.execute(
+        sa.select(Like.user_id, Like.project_id).where(Like.project_id.in_(projects))
+    ).all()) if projects else set()
+    now = datetime.utcnow()
+
+    rows = []
+    for record in records:
+        key = (users.get(record.get('author')), int(record['project_id']))
+        if key[0] is None or key[1] not in projects or key in existing:
+            continue
+        existing.add(key)
+        rows.append({'user_id': key[0], 'project_id': key[1],
+                     'created_at': _parse_datetime(record.get('created_at')) or now})
+    if rows:
+        db.session.execute(sa.insert(Like), rows)
+        _add_popularity([(row['project_id'], LIKE_WEIGHT, row['created_at']) for row in rows])
+    return len(rows)
+
+IMPORTERS = {
+    'categories': import_categories,
+    'tags': import_tags,
+    'projects': import_projects,
+    'comments': import_comments,
+    'likes': import_likes,
+}
+
+def sync_sequences():
+    """
+    No Postgres, ids explícitos não avançam a sequência: ajusta para o maior id
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+    db.session.execute(sa.text(
+        "SELECT setval(pg_get_serial_sequence('project', 'id'), COALESCE(MAX(id), 1)) FROM project"
+    ))
+
+def import_records(kind: str, records, chunk_size: int = 1000, render=map):
+    """
+    Importa registros em blocos, um commit por bloco.
+    Retorna (importados, lidos)
+    """
+    importer = IMPORTERS[kind]
+    resolver = Resolver(render)
+    imported = read = 0
+    for chunk in chunked(records, chunk_size):
+        imported += importer(chunk, resolver)
+        read += len(chunk)
+        db.session.commit()
+        # Os objetos carregados no bloco não são mais necessários
+        db.session.expunge_all()
+    if kind == 'projects':
+        sync_sequences()
+        db.session.commit()
+    return imported, read
+
+# --- Dados sintéticos ------------------------------------------------------
+
+WORDS = ('api flask python react dados cache fila worker docker deploy teste '
+         'busca perfil painel grafico mobile web nuvem rede modelo').split()
+
+def generate_projects(count: int, author: str, categories, seed: int = 0):
+    """
+    Projetos fictícios para benchmarks, no mesmo formato da exportação
+    """
+    rng = random.Random(seed)
+    tag_pool = [f'{word}-{n}' for word in WORDS for n in range(5)]
+    for n in range(count):
+        title = ' '.join(rng.choice(WORDS) for _ in range(3)).title()
+        paragraphs = [' '.join(rng.choice(WORDS) for _ in range(40)) for _ in range(3)]
+        yield {
+            'title': f'{title} {n}',
+            'description': paragraphs[0][:200],
+            'content': f'## {title}\n\n' + '\n\n'.join(paragraphs) + '\n\n- item **um**\n- item `dois`\n',
+            'github_link': f'https://github.com/{author}/projeto-{n}',
+            'is_published': True,
+            'is_featured': rng.random() < 0.05,
+            'author': author,
+            'category': rng.choice(categories) if categories else None,
+            'tags': rng.sample(tag_pool, 3),
+        }
+
+# --- Comandos --------------------------------------------------------------
+
+data_cli = AppGroup('data', help='Importação e exportação em massa.')
+
+kind_argument = click.argument('kind', type=click.Choice(list(FIELDS)))
+format_option = click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']),
+                             help='Padrão: pela extensão do arquivo (.csv ou JSON Lines).')
+chunk_option = click.option('--chunk-size', default=1000, show_default=True)
+
+@data_cli.command('export')
+@kind_argument
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+@format_option
+@chunk_option
+def export_command(kind, output, fmt, chunk_size):
+    """Exporta registros de KIND para OUTPUT (padrão: saída padrão)."""
+    started = time.perf_counter()
+    count = write_records(output, detect_format(output.name, fmt), kind, EXPORTERS[kind](chunk_size))
+    click.echo(f'{count} registros exportados em {time.perf_counter() - started:.1f}s', err=True)
+
+@data_cli.command('import')
+@kind_argument
+@click.argument('input_file', type=click.File('r', encoding='utf-8'))
+@format_option
+@chunk_option
+@click.option('--render-workers', default=os.cpu_count() or 1, show_default=True,
+              help='Processos para renderizar o Markdown dos projetos.')
+def import_command(kind, input_file, fmt, chunk_size, render_workers):
+    """Importa registros de KIND; autores e projetos inexistentes são ignorados."""
+    started = time.perf_counter()
+    records = read_records(input_file, detect_format(input_file.name, fmt))
+    if kind == 'projects' and render_workers > 1:
+        with ProcessPoolExecutor(render_workers) as pool:
+            render = partial(pool.map, chunksize=max(1, chunk_size // (render_workers * 4)))
+            imported, read = import_records(kind, records, chunk_size, render)
+    else:
+        imported, read = import_records(kind, records, chunk_size)
+    elapsed = time.perf_counter() - started
+    click.echo(f'{imported} de {read} registros importados em {elapsed:.1f}s '
+               f'({read / elapsed if elapsed else 0:.0f}/s)')
+
+@data_cli.command('generate')
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--projects', default=1000, show_default=True)
+@click.option('--author', default='edgar', show_default=True)
+@click.option('--seed', default=0)
+@format_option
+def generate_command(output, projects, author, seed, fmt):
+    """Gera projetos fictícios para benchmarks (importe com `flask data import projects`)."""
+    categories = [category.name for category in Category.query.order_by(Category.id)]
+    records = generate_projects(projects, author, categories, seed)
+    count = write_records(output, detect_format(output.name, fmt), 'projects', records)
+    click.echo(f'{count} projetos gerados', err=True)
@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+import sqlalchemy as sa
+from metrics import record_cache
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Cache em memória (por processo) com expiração por item.
+    Seguro entre threads; registra hits/misses nas métricas com o nome dado
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+        # Itens expirados continuam guardados (ver get_stale) até serem
+        # substituídos ou removidos por _evict
+        if entry is not None and entry[1] < time.monotonic():
+            entry = None
+        record_cache(self.name, entry is not None)
+        return default if entry is None else entry[0]
+
+    def contains(self, key) -> bool:
+        """
+        Se há um valor válido para a chave; não conta nas métricas
+        """
+        with self._lock:
+            entry = self._data.get(key)
+        return entry is not None and entry[1] >= time.monotonic()
+
+    def get_stale(self, key, default=None):
+        """
+        Retorna o valor mesmo que já tenha expirado; útil como último recurso
+        quando não é possível buscar um valor novo
+        """
+        with self._lock:
+            entry = self._data.get(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, ttl: float = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._evict()
+            self._data[key] = (value, expires)
+
+    def get_or_set(self, key, factory, ttl: float = None):
+        """
+        Retorna o valor em cache ou chama factory() e guarda o resultado
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, predicate):
+        """
+        Remove todas as chaves para as quais predicate(key) é verdadeiro
+        """
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self):
+        # Remove expirados; se não bastar, descarta o item mais antigo
+        now = time.monotonic()
+        for key in [k for k, (_, expires) in self._data.items() if expires < now]:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+
+class SharedTTLCache:
+    """
+    Cache compartilhado entre processos, guardado em um arquivo SQLite (como o
+    orçamento do GitHub). Os valores precisam ser serializáveis em JSON.
+    Cada processo mantém uma cópia local por até local_ttl segundos para não
+    ler o arquivo a cada acesso; depois disso relê o valor compartilhado
+    """
+
+    def __init__(self, name: str, path: str, ttl: float, local_ttl: float = 60, maxsize: int = 1024):
+        self.name = name
+        self.path = path
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self._local = TTLCache(name, ttl=local_ttl, maxsize=maxsize)
+        self._thread = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Uma conexão por thread e por processo (não sobrevive a um fork)
+        connection = getattr(self._thread, 'connection', None)
+        if connection is None or self._thread.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS shared_cache ('
+                'name TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+                'expires REAL NOT NULL, PRIMARY KEY (name, key))'
+            )
+            self._thread.connection = connection
+            self._thread.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _dump_key(key) -> str:
+        return json.dumps(key)
+
+    def _read(self, key):
+        """
+        (valor, expira em time.time()) guardado no arquivo, ou None
+        """
+        row = self._connection().execute(
+            'SELECT value, expires FROM shared_cache WHERE name = ? AND key = ?',
+            (self.name, self._dump_key(key)),
+        ).fetchone()
+        return None if row is None else (json.loads(row[0]), row[1])
+
+    def _lookup(self, key):
+        if self._local.contains(key):
+            return self._local.get_stale(key)
+        entry = self._read(key)
+        if entry is None or entry[1] < time.time():
+            return _MISSING
+        # A cópia local nunca passa da validade do valor compartilhado
+        self._local.set(key, entry[0], ttl=min(self.local_ttl, entry[1] - time.time()))
+        return entry[0]
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        record_cache(self.name, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def contains(self, key) -> bool:
+        """
+        Se há um valor válido para a chave; não conta nas métricas
+        """
+        return self._lookup(key) is not _MISSING
+
+    def get_stale(self, key, default=None):
+        """
+        Retorna o valor mesmo que já tenha expirado; útil como último recurso
+        quando não é possível buscar um valor novo
+        """
+        value = self._local.get_stale(key, _MISSING)
+        if value is _MISSING:
+            entry = self._read(key)
+            value = default if entry is None else entry[0]
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'INSERT OR REPLACE INTO shared_cache (name, key, value, expires) VALUES (?, ?, ?, ?)',
+                (self.name, self._dump_key(key), json.dumps(value), now + ttl),
+            )
+            # Chaves antigas (ex.: versões já substituídas) ficam guardadas
+            # para get_stale por mais um TTL e depois saem
+            connection.execute(
+                'DELETE FROM shared_cache WHERE name = ? AND expires < ?', (self.name, now - ttl)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        self._local.set(key, value, ttl=min(self.local_ttl, ttl))
+
+    def delete(self, key):
+        self._connection().execute(
+            'DELETE FROM shared_cache WHERE name = ? AND key = ?', (self.name, self._dump_key(key))
+        )
+        self._local.delete(key)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM shared_cache WHERE name = ?', (self.name,))
+        self._local.clear()
+
+# Versões compartilhadas (tabela CacheStamp). Cada processo relê a tabela no
+# máximo a cada CACHE_STAMP_TTL segundos, em uma única consulta
+_stamps = TTLCache('stamps', ttl=float(os.environ.get('CACHE_STAMP_TTL', 2)), maxsize=1)
+
+def get_stamps() -> dict:
+    """
+    Todas as versões compartilhadas, {chave: versão}
+    """
+    def load():
+        from models import CacheStamp
+        return {stamp.key: stamp.version for stamp in CacheStamp.query.all()}
+    return _stamps.get_or_set('all', load)
+
+def get_stamp(key: str) -> int:
+    """
+    Versão atual de uma chave (0 se nunca foi incrementada)
+    """
+    return get_stamps().get(key, 0)
+
+def bump_stamp(key: str):
+    """
+    Incrementa a versão de uma chave na sessão atual. Os outros workers
+    percebem a mudança depois do commit, em até CACHE_STAMP_TTL segundos
+    """
+    from app import db
+    from models import CacheStamp
+    # UPDATE atômico: dois workers incrementando ao mesmo tempo não se perdem
+    result = db.session.execute(
+        sa.update(CacheStamp)
+        .where(CacheStamp.key == key)
+        .values(version=CacheStamp.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        db.session.add(CacheStamp(key=key, version=1))
+    _stamps.clear()
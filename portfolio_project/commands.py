@@ -0,0 +1,121 @@
+import logging
+import click
+import sqlalchemy as sa
+from app import db
+
+def add_missing_columns():
+    """
+    Adiciona colunas novas dos modelos a tabelas já existentes.
+    create_all() só cria tabelas que ainda não existem
+    """
+    inspector = sa.inspect(db.engine)
+    added = []
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                connection.execute(sa.text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                ))
+                added.append(f'{table.name}.{column.name}')
+            # Índices de colunas novas também não são criados por create_all()
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+    return added
+
+def seed_defaults():
+    """
+    Cria o usuário admin e as categorias padrão se o banco estiver vazio
+    """
+    from models import User, Category
+
+    if User.query.count() > 0:
+        return False
+
+    admin_user = User(
+        username='edgar',
+        email='edgar@portfolio.com',
+        first_name='Edgar',
+        last_name='Gomes',
+        is_admin=True,
+        bio='Desenvolvedor Full Stack apaixonado por tecnologia e inovação',
+        linkedin_url='https://www.linkedin.com/in/edgar-gomes234',
+        github_url='https://github.com/EdGomes234'
+    )
+    admin_user.set_password('admin123')
+    db.session.add(admin_user)
+
+    # Create default categories
+    default_categories = [
+        {'name': 'Desenvolvimento Web', 'color': '#FF6B35'},
+        {'name': 'Mobile', 'color': '#28A745'},
+        {'name': 'Desktop', 'color': '#007BFF'},
+        {'name': 'Machine Learning', 'color': '#6F42C1'},
+        {'name': 'DevOps', 'color': '#DC3545'}
+    ]
+
+    for cat_data in default_categories:
+        category = Category(name=cat_data['name'], color=cat_data['color'])
+        db.session.add(category)
+
+    from reference_data import invalidate_categories
+    invalidate_categories()
+    db.session.commit()
+    return True
+
+@click.command('init-db')
+@click.option('--no-seed', is_flag=True, help='Só cria as tabelas, sem dados iniciais.')
+def init_db_command(no_seed):
+    """Cria as tabelas e os dados iniciais (admin e categorias)."""
+    import models  # noqa: F401
+    for column in add_missing_columns():
+        click.echo(f'Coluna adicionada: {column}')
+    db.create_all()
+    logging.info("Database tables created")
+    click.echo('Tabelas criadas.')
+
+    from popularity import backfill_scores
+    filled = backfill_scores()
+    if filled:
+        click.echo(f'Popularidade calculada para {filled} projetos.')
+
+    if not no_seed and seed_defaults():
+        logging.info("Admin user and default categories created")
+        click.echo('Usuário admin e categorias padrão criados.')
+
+@click.command('render-content')
+@click.option('--all', 'render_all', is_flag=True, help='Renderiza de novo mesmo o que não mudou.')
+def render_content_command(render_all):
+    """Gera o HTML do conteúdo Markdown dos projetos salvos."""
+    from models import Project
+
+    rendered = 0
+    for project in Project.query.filter(Project.content.isnot(None)).yield_per(100):
+        previous_hash = project.content_hash
+        if render_all:
+            project.content_hash = None
+        project.render_content()
+        if project.content_hash != previous_hash or render_all:
+            rendered += 1
+    db.session.commit()
+    click.echo(f'{rendered} projetos renderizados.')
+
+def register_commands(app):
+    """
+    Registra os comandos `flask ...` da aplicação
+    """
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(render_content_command)
+    from jobs import jobs_cli
+    from bulk import data_cli
+    from replica import sync_replica_command
+    from retention import notifications_cli
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(data_cli)
+    app.cli.add_command(notifications_cli)
+    app.cli.add_command(sync_replica_command)
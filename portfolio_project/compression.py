@@ -0,0 +1,246 @@
+import gzip
+import os
+import zlib
+import mimetypes
+import click
+from flask import current_app, request, send_from_directory
+from cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só usamos gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/xml',
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'image/svg+xml',
+}
+
+EXTENSIONS = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+# Estáticos comprimidos na hora (sem irmão .br/.gz), por arquivo, ETag e codificação
+_static_cache = TTLCache('static', ttl=24 * 3600, maxsize=256)
+
+class Compress:
+    """
+    Compressão de respostas (gzip/brotli) e envio de arquivos estáticos
+    pré-comprimidos (.br/.gz) quando existirem ao lado do original
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BR_LEVEL', 4)
+        app.config.setdefault('COMPRESS_STATIC', True)
+
+        app.after_request(self.after_request)
+        app.cli.add_command(precompress_static_command)
+        app.extensions['compress'] = self
+
+    def after_request(self, response):
+        config = current_app.config
+
+        # Proxy na frente já comprime: não fazemos nada
+        if not config['COMPRESS_ENABLED']:
+            return response
+
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+
+        encodings = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        if not encodings:
+            return response
+
+        if request.endpoint == 'static':
+            if not config['COMPRESS_STATIC']:
+                return response
+            precompressed = self._precompressed_static(response, encodings)
+            if precompressed is not None:
+                return precompressed
+            # Sem irmão .br/.gz (ex.: precompress-static não rodou): comprime
+            # aqui, uma vez por versão do arquivo
+            return self._compress_static(response, encodings[0], config)
+
+        # Arquivos (send_file) não são comprimidos aqui
+        if response.direct_passthrough:
+            return response
+
+        # HTML em streaming: comprime pedaço a pedaço, mantendo cada envio
+        if response.is_streamed:
+            encoding = encodings[0]
+            response.response = compress_stream(response.response, encoding, config)
+            response.headers['Content-Encoding'] = encoding
+            response.headers.pop('Content-Length', None)
+            return response
+
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+
+        encoding = encodings[0]
+        response.set_data(compress_bytes(data, encoding, config))
+        response.headers['Content-Encoding'] = encoding
+        etag, _weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak=True)
+        return response
+
+    def _precompressed_static(self, response, encodings):
+        """
+        Troca a resposta por um irmão .br/.gz do arquivo estático, se existir
+        """
+        filename = request.view_args.get('filename') if request.view_args else None
+        if not filename:
+            return None
+
+        static_folder = current_app.static_folder
+        for candidate in encodings:
+            sibling = filename + EXTENSIONS[candidate]
+            if not os.path.isfile(os.path.join(static_folder, sibling)):
+                continue
+
+            compressed = send_from_directory(static_folder, sibling,
+                                             mimetype=response.mimetype,
+                                             max_age=current_app.get_send_file_max_age(filename))
+            compressed.headers['Content-Encoding'] = candidate
+            compressed.vary.add('Accept-Encoding')
+            return compressed
+        return None
+
+    def _compress_static(self, response, encoding, config):
+        """
+        Comprime um arquivo estático servido por send_file, com cache em memória
+        """
+        etag, _weak = response.get_etag()
+        key = (request.view_args.get('filename'), etag, encoding)
+        compressed = _static_cache.get(key) if etag else None
+
+        body = response.response
+        response.direct_passthrough = False
+        try:
+            if compressed is None:
+                data = b''.join(body)
+                if len(data) < config['COMPRESS_MIN_SIZE']:
+                    response.set_data(data)
+                    return response
+                compressed = compress_bytes(data, encoding, config)
+                if etag:
+                    _static_cache.set(key, compressed)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak=True)
+        # O navegador revalida com o ETag da versão comprimida
+        return response.make_conditional(request)
+
+def accepted_encodings(accept_encoding: str) -> list:
+    """
+    Codificações suportadas pelo cliente, em ordem de preferência (brotli > gzip)
+    """
+    accepted = {}
+    for part in accept_encoding.split(','):
+        pieces = part.strip().split(';')
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in pieces[1:]:
+            param = param.strip()
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+
+    encodings = []
+    if brotli is not None and accepted.get('br', 0) > 0:
+        encodings.append('br')
+    if accepted.get('gzip', 0) > 0:
+        encodings.append('gzip')
+    return encodings
+
+def compress_bytes(data: bytes, encoding: str, config) -> bytes:
+    """
+    Comprime bytes com a codificação escolhida
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_LEVEL'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'])
+
+def compress_stream(chunks, encoding: str, config):
+    """
+    Comprime uma resposta em streaming. Cada pedaço recebido sai completo
+    (flush do compressor), para o navegador poder exibi-lo na hora
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['COMPRESS_BR_LEVEL'])
+        for chunk in chunks:
+            yield compressor.process(_as_bytes(chunk)) + compressor.flush()
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)  # 31: formato gzip
+    for chunk in chunks:
+        yield compressor.compress(_as_bytes(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def _as_bytes(chunk) -> bytes:
+    return chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+@click.command('precompress-static')
+@click.option('--force', is_flag=True, help='Recomprime mesmo arquivos já atualizados.')
+def precompress_static_command(force):
+    """Gera irmãos .gz/.br para os arquivos estáticos (CSS, JS, SVG)."""
+    static_folder = current_app.static_folder
+    written = 0
+
+    for root, _dirs, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(root, name)
+            mimetype, _ = mimetypes.guess_type(name)
+            if mimetype not in COMPRESSIBLE_MIMETYPES:
+                continue
+
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            encodings = ['gzip'] + (['br'] if brotli is not None else [])
+            for encoding in encodings:
+                target = path + EXTENSIONS[encoding]
+                if not force and os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                # Usa o nível máximo: o custo é pago uma única vez
+                if encoding == 'br':
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                written += 1
+
+    click.echo(f'{written} arquivos pré-comprimidos em {static_folder}')
@@ -0,0 +1,154 @@
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from app import db
+
+# Modo SQLite: WAL (leitores não bloqueiam o escritor), busy_timeout,
+# synchronous=NORMAL e mmap, aplicados em cada conexão nova. Escritas abrem a
+# transação com BEGIN IMMEDIATE e passam por uma fila de um escritor por
+# processo; entre processos quem espera é o busy_timeout do próprio SQLite
+
+def is_sqlite(uri: str) -> bool:
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+def engine_options(uri: str, config) -> dict:
+    """
+    Opções do engine conforme o banco. pool_recycle/pool_pre_ping só fazem
+    sentido com um servidor do outro lado da conexão
+    """
+    if is_sqlite(uri):
+        return {
+            'connect_args': {
+                'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000,
+                'check_same_thread': False,
+            },
+        }
+    return {
+        'pool_recycle': 300,
+        'pool_pre_ping': True,
+    }
+
+class SQLiteTuning:
+    """
+    Liga pragmas e a fila de escrita nos engines SQLite da aplicação
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_TUNING', True)
+        app.config.setdefault('SQLITE_WAL', True)
+        app.config.setdefault('SQLITE_BUSY_TIMEOUT', 5000)  # ms
+        app.config.setdefault('SQLITE_SYNCHRONOUS', 'NORMAL')
+        app.config.setdefault('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+        app.config.setdefault('SQLITE_CACHE_SIZE', -16000)  # negativo = KiB
+
+        if not app.config['SQLITE_TUNING']:
+            return
+        with app.app_context():
+            engines = [engine for engine in db.engines.values() if engine.dialect.name == 'sqlite']
+        for engine in engines:
+            tune_engine(engine, app.config)
+        if engines:
+            app.extensions['sqlite_tuning'] = self
+
+def tune_engine(engine, config):
+    writer = WriterQueue(config['SQLITE_BUSY_TIMEOUT'] / 1000)
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size = {int(config['SQLITE_CACHE_SIZE'])}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if config['SQLITE_WAL'] and engine.url.database not in (None, '', ':memory:'):
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        # O driver deixa de abrir transações sozinho; BEGIN é emitido no
+        # evento 'begin' abaixo, e escritas trocam por BEGIN IMMEDIATE
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def on_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+        # Para WriterQueue.acquire saber se a transação já gravou algo
+        connection.info['sqlite_changes'] = connection.connection.dbapi_connection.total_changes
+
+    @event.listens_for(engine, 'commit')
+    @event.listens_for(engine, 'rollback')
+    def on_end(connection):
+        writer.release(connection.info)
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        writer.release(connection_record.info)
+
+    engine.sqlite_writer = writer
+
+class WriterQueue:
+    """
+    Um escritor por vez neste processo. As threads esperam aqui, em vez de
+    disputarem o lock do arquivo e cair no 'database is locked'
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        # Semáforo e não Lock: pode ser liberado por outra thread (ex.: a
+        # conexão devolvida ao pool pelo coletor de lixo)
+        self._slot = threading.BoundedSemaphore(1)
+
+    def acquire(self, connection):
+        """
+        Troca a transação de leitura da conexão por uma de escrita
+        """
+        if connection.info.get('sqlite_writer'):
+            return
+        # Sem a vaga no tempo limite seguimos assim mesmo: o busy_timeout
+        # do SQLite ainda protege, e nunca ficamos travados aqui
+        acquired = self._slot.acquire(timeout=self.timeout)
+        connection.info['sqlite_writer'] = 'slot' if acquired else 'no-slot'
+        # A transação já gravou (ex.: um text() com INSERT, que não passa
+        # pelos eventos do ORM) e portanto já tem o lock de escrita: um
+        # COMMIT aqui confirmaria esse trabalho antes da hora
+        changes = connection.connection.dbapi_connection.total_changes
+        if changes != connection.info.get('sqlite_changes', changes):
+            return
+        # Uma leitura DEFERRED não pode virar escrita se outro processo
+        # gravou depois dela (erro imediato, sem esperar o busy_timeout).
+        # Como no READ COMMITTED do Postgres, a escrita vê o estado atual
+        connection.exec_driver_sql('COMMIT')
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+    def release(self, info):
+        state = info.pop('sqlite_writer', None)
+        if state == 'slot':
+            self._slot.release()
+
+def _writer_for(connection):
+    return getattr(connection.engine, 'sqlite_writer', None)
+
+@event.listens_for(Session, 'before_flush')
+def _before_flush(session, flush_context, instances):
+    connection = session.connection()
+    writer = _writer_for(connection)
+    if writer is not None:
+        writer.acquire(connection)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _before_orm_write(orm_execute_state):
+    # UPDATE/DELETE/INSERT em massa não passam pelo flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    connection = orm_execute_state.session.connection(bind_arguments=orm_execute_state.bind_arguments)
+    writer = _writer_for(connection)
+    if writer is not None:
+        writer.acquire(connection)
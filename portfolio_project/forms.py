@@ -3,6 +3,7 @@ from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, TextAreaField, PasswordField, BooleanField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, Optional, URL, Regexp
 from models import User, Category
+from reference_data import get_categories
 
 class LoginForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -51,7 +52,7 @@ class ProjectForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(ProjectForm, self).__init__(*args, **kwargs)
         self.category_id.choices = [(0, 'Selecione uma categoria')] + \
-                                  [(c.id, c.name) for c in Category.query.all()]
+                                  [(c.id, c.name) for c in get_categories()]
 
 class CommentForm(FlaskForm):
     content = TextAreaField('Comentário', validators=[DataRequired(), Length(min=1, max=1000)])
@@ -0,0 +1,69 @@
+import os
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from flask import current_app
+from cache import TTLCache
+
+# Trechos de template renderizados, guardados por processo. A chave é montada
+# no template com o que muda o trecho (ex.: slug e data de atualização):
+#
+#     {% cache 'project-card', project.slug, project.github_updated %}
+#         ...
+#     {% endcache %}
+#
+# Nada que dependa do usuário logado, do CSRF ou da hora atual (time_ago)
+# deve ficar dentro de um bloco em cache. Uma parte None na chave desliga o
+# cache naquela renderização (ex.: conteúdo que ainda pode vir incompleto)
+fragment_cache = TTLCache('fragments', ttl=3600, maxsize=2048)
+
+class FragmentCacheExtension(Extension):
+    """
+    Tag {% cache nome, partes... %} ... {% endcache %}
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        config = current_app.config
+        if not config['FRAGMENT_CACHE_ENABLED'] or any(part is None for part in parts):
+            return caller()
+        # str() nas partes: datas, Deferred e afins viram chaves comparáveis
+        key = tuple(str(part) for part in parts)
+        fragment = fragment_cache.get(key)
+        if fragment is None:
+            fragment = Markup(caller())
+            fragment_cache.set(key, fragment, ttl=config['FRAGMENT_CACHE_TTL'])
+        return fragment
+
+class FragmentCache:
+    """
+    Liga a tag {% cache %} e o cache de bytecode dos templates em disco: um
+    worker novo carrega o código já compilado em vez de compilar cada template
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('FRAGMENT_CACHE_ENABLED', True)
+        app.config.setdefault('FRAGMENT_CACHE_TTL', 3600)
+        app.config.setdefault('JINJA_BYTECODE_CACHE_DIR', os.path.join('instance', 'jinja_cache'))
+
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        directory = app.config['JINJA_BYTECODE_CACHE_DIR']
+        if directory:
+            # Cada arquivo guarda o checksum do template de origem: editar um
+            # template invalida o bytecode dele sozinho
+            os.makedirs(directory, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+        app.extensions['fragment_cache'] = self
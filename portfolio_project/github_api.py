@@ -1,17 +1,54 @@
+import os
+import time
 import requests
 import logging
 from typing import List, Dict, Optional
+from cache import SharedTTLCache, get_stamp
+from instrumentation import record_github_call
+from rendering import render_markdown
+from github_budget import PRIORITY_REQUEST, get_budget
+from metrics import record_github_budget, record_github_rate_limit
 
 logger = logging.getLogger(__name__)
 
+# Cache dos dados de repositórios compartilhado por todos os workers, no mesmo
+# arquivo SQLite do orçamento: um dado buscado por um worker serve aos outros,
+# em vez de cada processo gastar o orçamento buscando a mesma coisa. Cada worker
+# ainda guarda uma cópia local por GITHUB_CACHE_LOCAL_TTL segundos.
+# Com o webhook configurado os dados chegam por push, então o TTL pode ser longo
+DEFAULT_CACHE_TTL = 24 * 3600 if os.environ.get('GITHUB_WEBHOOK_SECRET') else 600
+repo_cache = SharedTTLCache(
+    'github',
+    path=os.environ.get('GITHUB_CACHE_PATH',
+                        os.environ.get('GITHUB_BUDGET_PATH', os.path.join('instance', 'github_budget.db'))),
+    ttl=int(os.environ.get('GITHUB_CACHE_TTL', DEFAULT_CACHE_TTL)),
+    local_ttl=int(os.environ.get('GITHUB_CACHE_LOCAL_TTL', 60)),
+)
+
+# Resposta 404 do README: o repositório não tem um
+NO_README = {'source': None, 'html': None}
+
+def repository_stamp_key(username: str, repo_name: str) -> str:
+    """
+    Chave da versão compartilhada (CacheStamp) dos dados de um repositório
+    """
+    return f"github:{username.lower()}/{repo_name.lower()}"
+
+class GitHubBudgetExceeded(requests.RequestException):
+    """
+    O orçamento compartilhado de chamadas acabou; a chamada nem foi feita
+    """
+
 class GitHubAPI:
     """
     Classe para interagir com a API do GitHub
     """
     
-    def __init__(self, username: str, token: Optional[str] = None):
+    def __init__(self, username: str, token: Optional[str] = None, priority: str = PRIORITY_REQUEST):
         self.username = username
         self.token = token
+        self.priority = priority
+        self.budget = get_budget(authenticated=bool(token))
         self.base_url = "https://api.github.com"
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
@@ -21,13 +58,36 @@ class GitHubAPI:
         if token:
             self.headers["Authorization"] = f"token {token}"
     
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Faz um GET na API registrando a latência na requisição atual.
+        Cada chamada consome um token do orçamento compartilhado entre workers
+        """
+        if not self.budget.acquire(priority=self.priority):
+            record_github_budget(self.budget.last_tokens, denied_priority=self.priority)
+            raise GitHubBudgetExceeded(f"Orçamento de chamadas ao GitHub esgotado ({self.priority})")
+        
+        started = time.perf_counter()
+        try:
+            response = requests.get(url, headers=self.headers, timeout=10, **kwargs)
+        finally:
+            record_github_call(time.perf_counter() - started)
+        record_github_rate_limit(response.headers)
+        
+        # O limite real do GitHub manda: se ele diz que restam menos, acreditamos nele
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is not None and remaining.isdigit():
+            self.budget.sync(int(remaining))
+        record_github_budget(self.budget.last_tokens)
+        return response
+    
     def get_user_info(self) -> Optional[Dict]:
         """
         Obtém informações do usuário do GitHub
         """
         try:
             url = f"{self.base_url}/users/{self.username}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self._get(url)
             
             if response.status_code == 200:
                 return response.json()
@@ -51,7 +111,7 @@ class GitHubAPI:
                 "direction": "desc"
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = self._get(url, params=params)
             
             if response.status_code == 200:
                 return response.json()
@@ -69,7 +129,7 @@ class GitHubAPI:
         """
         try:
             url = f"{self.base_url}/repos/{self.username}/{repo_name}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self._get(url)
             
             if response.status_code == 200:
                 return response.json()
@@ -87,7 +147,7 @@ class GitHubAPI:
         """
         try:
             url = f"{self.base_url}/repos/{self.username}/{repo_name}/languages"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self._get(url)
             
             if response.status_code == 200:
                 return response.json()
@@ -99,30 +159,37 @@ class GitHubAPI:
             logger.error(f"Erro na requisição para API do GitHub: {e}")
             return {}
     
-    def get_repository_readme(self, repo_name: str) -> Optional[str]:
+    def _request_readme(self, repo_name: str):
         """
-        Obtém o conteúdo do README de um repositório
+        (status HTTP, conteúdo) do README. Status None quando a chamada nem
+        terminou (erro de rede, orçamento esgotado)
         """
         try:
             url = f"{self.base_url}/repos/{self.username}/{repo_name}/readme"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self._get(url)
             
             if response.status_code == 200:
                 readme_data = response.json()
                 # O conteúdo vem em base64, precisa decodificar
                 import base64
                 content = base64.b64decode(readme_data['content']).decode('utf-8')
-                return content
+                return response.status_code, content
             else:
                 logger.warning(f"README não encontrado para o repositório {repo_name}")
-                return None
+                return response.status_code, None
                 
         except requests.RequestException as e:
             logger.error(f"Erro na requisição para API do GitHub: {e}")
-            return None
+            return None, None
         except Exception as e:
             logger.error(f"Erro ao decodificar README: {e}")
-            return None
+            return None, None
+    
+    def get_repository_readme(self, repo_name: str) -> Optional[str]:
+        """
+        Obtém o conteúdo do README de um repositório
+        """
+        return self._request_readme(repo_name)[1]
     
     def get_pinned_repositories(self) -> List[str]:
         """
@@ -140,26 +207,125 @@ class GitHubAPI:
         ]
         return pinned_repos
     
+    def find_pinned_repository(self, slug: str) -> Optional[str]:
+        """
+        Retorna o nome canônico do repositório fixado correspondente ao slug
+        """
+        for repo_name in self.get_pinned_repositories():
+            if repo_name.lower() == slug.lower():
+                return repo_name
+        return None
+    
+    def repository_version(self, repo_name: str) -> int:
+        """
+        Versão compartilhada dos dados de um repositório; o webhook a incrementa
+        """
+        return get_stamp(repository_stamp_key(self.username, repo_name))
+    
+    def _cache_key(self, kind: str, repo_name: str):
+        # A versão compartilhada do repositório faz parte da chave: quando o
+        # webhook a incrementa, todos os workers passam a buscar dados novos
+        version = self.repository_version(repo_name)
+        return (self.username.lower(), kind, repo_name.lower(), version)
+    
+    def store_repository(self, repo_details: Dict):
+        """
+        Guarda no cache detalhes de repositório recebidos de fora (ex.: webhook)
+        """
+        repo_cache.set(self._cache_key('repo', repo_details['name']), repo_details)
+    
+    def get_repository(self, repo_name: str) -> Optional[Dict]:
+        """
+        Detalhes de um repositório, usando o cache (uma chamada à API no miss)
+        """
+        key = self._cache_key('repo', repo_name)
+        repo_details = repo_cache.get(key)
+        if repo_details is None:
+            repo_details = self.get_repository_details(repo_name)
+            # Falhas não são guardadas para que a próxima visita tente de novo;
+            # enquanto isso (ex.: orçamento esgotado) usamos os dados antigos
+            if repo_details is not None:
+                repo_cache.set(key, repo_details)
+            else:
+                repo_details = repo_cache.get_stale(key)
+        return repo_details
+    
+    def refresh_repository(self, repo_name: str) -> Optional[Dict]:
+        """
+        Busca de novo os detalhes e o README de um repositório, ignorando o cache
+        """
+        repo_details = self.get_repository_details(repo_name)
+        if repo_details is not None:
+            repo_cache.set(self._cache_key('repo', repo_name), repo_details)
+        repo_cache.delete(self._cache_key('readme', repo_name))
+        self._get_cached_readme(repo_name)
+        return repo_details
+    
+    def _get_cached_readme(self, repo_name: str) -> Optional[Dict]:
+        # Renderiza o Markdown uma única vez, no momento da busca, e guarda
+        # o HTML junto do texto original
+        key = self._cache_key('readme', repo_name)
+        readme = repo_cache.get(key)
+        if readme is None:
+            status, source = self._request_readme(repo_name)
+            if source is not None:
+                readme = {'source': source, 'html': render_markdown(source)}
+            elif status == 404:
+                # Repositório sem README: também fica no cache, senão cada
+                # visita gastaria uma chamada para descobrir de novo
+                readme = NO_README
+            # Como em get_repository: falhas passageiras não vão para o cache,
+            # e enquanto isso mostramos o README antigo, se houver
+            if readme is not None:
+                repo_cache.set(key, readme)
+            else:
+                readme = repo_cache.get_stale(key)
+        return readme
+    
+    def has_cached_readme(self, repo_name: str) -> bool:
+        """
+        Se o README (ou a falta dele) já está no cache, sem chamar a API
+        """
+        return repo_cache.contains(self._cache_key('readme', repo_name))
+    
+    def get_readme_parts(self, repo_name: str) -> Dict:
+        """
+        README em {'source': Markdown, 'html': HTML sanitizado}, os dois None
+        se não houver. Uma única busca serve as duas formas
+        """
+        return self._get_cached_readme(repo_name) or NO_README
+    
+    def get_readme(self, repo_name: str) -> Optional[str]:
+        """
+        README de um repositório, usando o cache. Buscado só quando necessário
+        """
+        return self.get_readme_parts(repo_name)['source']
+    
+    def get_readme_html(self, repo_name: str) -> Optional[str]:
+        """
+        README já renderizado em HTML sanitizado
+        """
+        return self.get_readme_parts(repo_name)['html']
+    
     def get_pinned_repositories_details(self) -> List[Dict]:
         """
-        Obtém detalhes dos repositórios fixados
+        Obtém detalhes dos repositórios fixados (sem README, que é buscado
+        sob demanda na página de detalhes)
         """
         pinned_repos = self.get_pinned_repositories()
         repositories_details = []
         
         for repo_name in pinned_repos:
-            repo_details = self.get_repository_details(repo_name)
+            repo_details = self.get_repository(repo_name)
             if repo_details:
-                # Adiciona informações extras
-                repo_details['languages'] = self.get_repository_languages(repo_name)
-                repo_details['readme'] = self.get_repository_readme(repo_name)
                 repositories_details.append(repo_details)
         
         return repositories_details
 
-def create_github_client(username: str = "EdGomes234", token: Optional[str] = None) -> GitHubAPI:
+def create_github_client(username: str = "EdGomes234", token: Optional[str] = None,
+                         priority: str = PRIORITY_REQUEST) -> GitHubAPI:
     """
     Factory function para criar uma instância do cliente GitHub
     """
-    return GitHubAPI(username, token)
+    return GitHubAPI(username, token or os.environ.get('GITHUB_TOKEN'), priority)
 
@@ -0,0 +1,112 @@
+import os
+import time
+import sqlite3
+import threading
+
+# Prioridades de consumo: atualizações em segundo plano podem usar o balde
+# inteiro; buscas feitas durante uma requisição deixam uma reserva para elas
+PRIORITY_BACKGROUND = 'background'
+PRIORITY_REQUEST = 'request'
+
+class TokenBucket:
+    """
+    Balde de tokens compartilhado entre processos, guardado em um arquivo
+    SQLite. Cada aquisição é uma transação BEGIN IMMEDIATE, que serializa os
+    workers do gunicorn sem precisar de Redis
+    """
+
+    def __init__(self, path: str, name: str, capacity: float, refill_seconds: float = 3600,
+                 request_reserve: float = 0):
+        self.path = path
+        self.name = name
+        self.capacity = capacity
+        self.refill_rate = capacity / refill_seconds
+        self.request_reserve = request_reserve
+        self.last_tokens = capacity  # Último saldo visto por este processo
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Uma conexão por thread e por processo (não sobrevive a um fork)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS bucket ('
+                'name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _transaction(self, update):
+        """
+        Lê o balde já reabastecido, aplica update(tokens) -> (tokens, resultado)
+        e grava, tudo em uma transação exclusiva
+        """
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = connection.execute(
+                'SELECT tokens, updated FROM bucket WHERE name = ?', (self.name,)
+            ).fetchone()
+            if row is None:
+                tokens = self.capacity
+            else:
+                tokens = min(self.capacity, row[0] + (now - row[1]) * self.refill_rate)
+
+            tokens, result = update(tokens)
+            self.last_tokens = tokens
+            connection.execute(
+                'INSERT OR REPLACE INTO bucket (name, tokens, updated) VALUES (?, ?, ?)',
+                (self.name, tokens, now),
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return result
+
+    def acquire(self, cost: float = 1, priority: str = PRIORITY_REQUEST) -> bool:
+        """
+        Tenta consumir `cost` tokens. Retorna False se o orçamento acabou
+        """
+        floor = self.request_reserve if priority == PRIORITY_REQUEST else 0
+
+        def update(tokens):
+            if tokens - cost >= floor:
+                return tokens - cost, True
+            return tokens, False
+
+        return self._transaction(update)
+
+    def sync(self, remaining: int):
+        """
+        Ajusta o balde ao X-RateLimit-Remaining real do GitHub (nunca para cima)
+        """
+        return self._transaction(lambda tokens: (min(tokens, remaining), None))
+
+    def remaining(self) -> float:
+        return self._transaction(lambda tokens: (tokens, tokens))
+
+_budget = None
+_budget_lock = threading.Lock()
+
+def get_budget(authenticated: bool) -> TokenBucket:
+    """
+    Orçamento do processo, configurado por variáveis de ambiente.
+    Sem token o GitHub permite 60 requisições/hora; com token, 5000
+    """
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            capacity = float(os.environ.get('GITHUB_BUDGET_CAPACITY', 5000 if authenticated else 60))
+            reserve = float(os.environ.get('GITHUB_BUDGET_RESERVE', capacity * 0.2))
+            _budget = TokenBucket(
+                path=os.environ.get('GITHUB_BUDGET_PATH', os.path.join('instance', 'github_budget.db')),
+                name='github',
+                capacity=capacity,
+                request_reserve=reserve,
+            )
+        return _budget
@@ -0,0 +1,81 @@
+"""
+Configuração do gunicorn para produção.
+
+Todos os valores podem ser sobrescritos por variáveis de ambiente:
+    WEB_CONCURRENCY           número de workers (padrão: 2 * CPUs + 1)
+    GUNICORN_WORKER_CLASS     gthread (padrão), gevent ou sync
+    GUNICORN_THREADS          threads por worker no modo gthread
+    GUNICORN_TIMEOUT          segundos até um worker travado ser reiniciado
+    GUNICORN_MAX_REQUESTS     requisições até o worker ser reciclado
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# gthread: uma chamada lenta ao GitHub ocupa só uma thread, não o worker inteiro.
+# requests e as sessões do Flask-SQLAlchemy (uma por app context) são seguros
+# entre threads.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+if worker_class == 'gevent':
+    # Com preload_app o app é importado no master, antes do gevent aplicar o
+    # monkey patching do worker; por isso aplicamos aqui, antes de qualquer import
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:  # psycogreen é opcional; só importa com Postgres
+        pass
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recicla workers periodicamente para conter vazamentos de memória
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Carrega o app uma vez no master; os workers herdam por fork
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def on_starting(server):
+    # Limpa os arquivos de métricas de execuções anteriores
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for name in os.listdir(multiproc_dir):
+            os.remove(os.path.join(multiproc_dir, name))
+
+def post_fork(server, worker):
+    # Conexões abertas no master não podem ser compartilhadas entre processos:
+    # cada worker descarta o pool herdado e abre as suas próprias conexões
+    if not server.cfg.preload_app:
+        return
+    from app import db
+    from main import app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def worker_exit(server, worker):
+    # Grava as visualizações que ainda estão só na memória do worker
+    from popularity import view_counter
+    try:
+        view_counter.flush()
+    except Exception as e:
+        server.log.error(f"Erro ao gravar visualizações pendentes: {e}")
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
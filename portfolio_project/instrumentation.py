@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import random
+import logging
+from flask import current_app, g, request, has_request_context, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import pyinstrument
+except ImportError:  # pyinstrument é opcional; sem ele usamos cProfile
+    pyinstrument = None
+
+logger = logging.getLogger('portfolio.requests')
+
+class RequestStats:
+    """
+    Métricas acumuladas durante uma única requisição
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.github_count = 0
+        self.github_time = 0.0
+        self.template_time = 0.0
+        self._template_started = []
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+def current_stats():
+    """
+    Retorna as métricas da requisição atual, ou None fora de uma requisição
+    """
+    if not has_request_context():
+        return None
+    return g.get('_request_stats')
+
+def record_github_call(elapsed: float):
+    """
+    Registra uma chamada à API do GitHub na requisição atual
+    """
+    stats = current_stats()
+    if stats is not None:
+        stats.github_count += 1
+        stats.github_time += elapsed
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['_query_started'].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - started
+
+def _before_render(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None:
+        stats._template_started.append(time.perf_counter())
+
+def _after_render(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None and stats._template_started:
+        stats.template_time += time.perf_counter() - stats._template_started.pop()
+
+class Instrumentation:
+    """
+    Instrumentação por requisição: tempo total, SQL, GitHub e templates.
+    Expõe os dados em Server-Timing, em logs estruturados e, para uma
+    amostra das requisições, em dumps de profiling
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('INSTRUMENTATION_ENABLED', True)
+        app.config.setdefault('SERVER_TIMING_HEADER', True)
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_DIR', 'profiles')
+
+        if not app.config['INSTRUMENTATION_ENABLED']:
+            return
+
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+        before_render_template.connect(_before_render, app)
+        template_rendered.connect(_after_render, app)
+        app.extensions['instrumentation'] = self
+
+    def before_request(self):
+        g._request_stats = RequestStats()
+
+        rate = current_app.config['PROFILE_SAMPLE_RATE']
+        if rate and random.random() < rate:
+            g._profiler = start_profiler()
+
+    def after_request(self, response):
+        stats = current_stats()
+        if stats is None:
+            return response
+
+        info = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+        }
+        if response.is_streamed:
+            # HTML em streaming (streaming.py): os headers saem antes do corpo,
+            # e o GitHub, o SQL e o template ainda vão rodar. O header só mede
+            # até aqui; o log sai quando o último pedaço tiver sido enviado
+            if current_app.config['SERVER_TIMING_HEADER']:
+                response.headers['Server-Timing'] = f'headers;dur={stats.elapsed * 1000:.1f}'
+            response.call_on_close(lambda: log_request(info, stats))
+            return response
+
+        if current_app.config['SERVER_TIMING_HEADER']:
+            response.headers['Server-Timing'] = ', '.join([
+                f'app;dur={stats.elapsed * 1000:.1f}',
+                f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries"',
+                f'github;dur={stats.github_time * 1000:.1f};desc="{stats.github_count} calls"',
+                f'template;dur={stats.template_time * 1000:.1f}',
+            ])
+        log_request(info, stats)
+        return response
+
+    def teardown_request(self, exc):
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            stop_profiler(profiler, current_app.config['PROFILE_DIR'])
+
+def log_request(info: dict, stats: RequestStats):
+    """
+    Linha de log estruturado de uma requisição terminada
+    """
+    logger.info(json.dumps({
+        **info,
+        'duration_ms': round(stats.elapsed * 1000, 2),
+        'sql_count': stats.sql_count,
+        'sql_ms': round(stats.sql_time * 1000, 2),
+        'github_count': stats.github_count,
+        'github_ms': round(stats.github_time * 1000, 2),
+        'template_ms': round(stats.template_time * 1000, 2),
+    }))
+
+def start_profiler():
+    """
+    Inicia o profiler (pyinstrument se disponível, senão cProfile)
+    """
+    if pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+def stop_profiler(profiler, profile_dir: str):
+    """
+    Para o profiler e grava o resultado em profile_dir
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    name = f"{int(time.time() * 1000)}-{request.endpoint or 'unknown'}"
+
+    if pyinstrument is not None:
+        profiler.stop()
+        path = os.path.join(profile_dir, f'{name}.html')
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.disable()
+        path = os.path.join(profile_dir, f'{name}.prof')
+        profiler.dump_stats(path)
+
+    logger.info(f"Profile gravado em {path}")
@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import signal
+import socket
+import logging
+import traceback
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Tarefas registradas com @task, por nome
+TASKS = {}
+
+def task(name: str = None, max_attempts: int = 5):
+    """
+    Registra uma função como tarefa executável pela fila
+    """
+    def decorator(func):
+        func.task_name = name or func.__name__
+        func.max_attempts = max_attempts
+        TASKS[func.task_name] = func
+        return func
+    return decorator
+
+def enqueue(task_name: str, delay: float = 0, **kwargs):
+    """
+    Coloca uma tarefa na fila. O job entra na sessão atual e só fica visível
+    para o worker quando a requisição fizer commit, junto com o resto.
+    Com JOBS_ENABLED desligado (sem processo worker) a tarefa roda na hora
+    """
+    from models import Job
+
+    func = TASKS[task_name]
+    if not current_app.config.get('JOBS_ENABLED'):
+        func(**kwargs)
+        return None
+
+    job = Job(
+        task=task_name,
+        payload=json.dumps(kwargs),
+        max_attempts=func.max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.session.add(job)
+    return job
+
+def claim_job(worker_id: str):
+    """
+    Reserva o próximo job pronto. Jobs 'running' cujo worker sumiu há mais de
+    JOB_VISIBILITY_TIMEOUT segundos voltam a ficar disponíveis
+    """
+    from models import Job
+
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config['JOB_VISIBILITY_TIMEOUT'])
+    # Um job que derruba o worker (falta de memória, segfault) nunca chega ao
+    # except de run_job: ao ser recuperado sem tentativas sobrando, falha aqui
+    abandoned = db.session.query(Job).filter(
+        Job.status == 'running', Job.locked_at < stale, Job.attempts >= Job.max_attempts,
+    ).update(
+        {'status': 'failed', 'finished_at': now, 'locked_at': None, 'locked_by': None,
+         'last_error': 'O worker parou durante a execução (tentativas esgotadas)'},
+        synchronize_session=False,
+    )
+    if abandoned:
+        db.session.commit()
+        logger.error(f"{abandoned} job(s) abandonados por workers marcados como falhos")
+    ready = db.or_(
+        db.and_(Job.status == 'queued', Job.run_at <= now),
+        db.and_(Job.status == 'running', Job.locked_at < stale, Job.attempts < Job.max_attempts),
+    )
+    query = db.session.query(Job.id).filter(ready).order_by(Job.run_at, Job.id).limit(10)
+    if db.engine.dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+
+    for (job_id,) in query.all():
+        # UPDATE condicional: se outro worker pegou antes, rowcount é 0
+        claimed = db.session.query(Job).filter(Job.id == job_id, ready).update(
+            {'status': 'running', 'locked_at': now, 'locked_by': worker_id,
+             'attempts': Job.attempts + 1},
+            synchronize_session=False,
+        )
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+    db.session.commit()
+    return None
+
+def run_job(job):
+    """
+    Executa um job já reservado e registra o resultado (com nova tentativa
+    em backoff exponencial se falhar). Retorna True em caso de sucesso
+    """
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f"Tarefa desconhecida: {job.task}")
+        func(**json.loads(job.payload or '{}'))
+        # Efeitos da tarefa e conclusão do job no mesmo commit
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        job.last_error = None
+        job.locked_at = None
+        job.locked_by = None
+        db.session.commit()
+        return True
+    except Exception:
+        db.session.rollback()
+        job.last_error = traceback.format_exc(limit=5)
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            logger.error(f"Job {job.id} ({job.task}) falhou definitivamente")
+        else:
+            job.status = 'queued'
+            job.run_at = datetime.utcnow() + timedelta(seconds=2 ** job.attempts)
+            logger.warning(f"Job {job.id} ({job.task}) falhou; nova tentativa em {2 ** job.attempts}s")
+        job.locked_at = None
+        job.locked_by = None
+        db.session.commit()
+        return False
+
+def work(burst: bool = False, max_jobs: int = None) -> int:
+    """
+    Loop do worker. Com burst=True termina quando a fila esvazia.
+    Retorna quantos jobs foram processados
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    poll_interval = current_app.config['JOB_POLL_INTERVAL']
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+
+    processed = 0
+    while not stopping and (max_jobs is None or processed < max_jobs):
+        job = claim_job(worker_id)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
+
+jobs_cli = AppGroup('jobs', help='Fila de tarefas em segundo plano.')
+
+@jobs_cli.command('worker')
+@click.option('--burst', is_flag=True, help='Sai quando a fila estiver vazia.')
+def worker_command(burst):
+    """Processa jobs da fila até receber SIGTERM."""
+    import tasks  # noqa: F401  (registra as tarefas)
+    click.echo(f'Worker iniciado ({len(TASKS)} tarefas registradas)')
+    processed = work(burst=burst)
+    click.echo(f'{processed} jobs processados')
+
+@jobs_cli.command('stats')
+def stats_command():
+    """Quantidade de jobs por status."""
+    from models import Job
+    rows = db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all()
+    for status, count in sorted(rows):
+        click.echo(f'{status:<8} {count}')
+
+@jobs_cli.command('list')
+@click.option('--status', type=click.Choice(['queued', 'running', 'done', 'failed']))
+@click.option('--limit', default=20)
+def list_command(status, limit):
+    """Jobs mais recentes."""
+    from models import Job
+    query = Job.query.order_by(Job.id.desc())
+    if status:
+        query = query.filter_by(status=status)
+    for job in query.limit(limit):
+        click.echo(f'{job.id:>6} {job.status:<8} {job.task:<24} tentativas={job.attempts} '
+                   f'criado={job.created_at:%Y-%m-%d %H:%M:%S}')
+        if job.status == 'failed' and job.last_error:
+            click.echo('       ' + job.last_error.strip().splitlines()[-1])
+
+@jobs_cli.command('retry')
+@click.argument('job_id', type=int)
+def retry_command(job_id):
+    """Recoloca um job que falhou na fila."""
+    from models import Job
+    job = db.session.get(Job, job_id)
+    if job is None:
+        raise click.ClickException(f'Job {job_id} não encontrado')
+    job.status = 'queued'
+    job.attempts = 0
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    click.echo(f'Job {job_id} recolocado na fila')
@@ -0,0 +1,191 @@
+import os
+import time
+from flask import Response, abort, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+# Com PROMETHEUS_MULTIPROC_DIR definido, o prometheus_client grava os valores
+# em arquivos mmap compartilhados e o /metrics agrega todos os workers
+
+REQUEST_COUNT = Counter(
+    'portfolio_http_requests_total',
+    'Requisições HTTP por rota e status',
+    ['method', 'endpoint', 'status'],
+)
+
+REQUEST_LATENCY = Histogram(
+    'portfolio_http_request_duration_seconds',
+    'Latência das requisições HTTP por rota',
+    ['method', 'endpoint'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+DB_POOL_SIZE = Gauge(
+    'portfolio_db_pool_size',
+    'Tamanho configurado do pool de conexões',
+    ['role'],
+    multiprocess_mode='livesum',
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    'portfolio_db_pool_checked_out',
+    'Conexões do pool em uso',
+    ['role'],
+    multiprocess_mode='livesum',
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    'portfolio_db_pool_overflow',
+    'Conexões abertas além do tamanho do pool',
+    ['role'],
+    multiprocess_mode='livesum',
+)
+
+# Os dois valores abaixo são compartilhados (limite do GitHub, orçamento comum):
+# vale a leitura mais recente de qualquer worker, vivo ou já reciclado, e não a
+# menor já vista (que nunca subiria depois do reset de hora em hora)
+GITHUB_RATE_LIMIT_REMAINING = Gauge(
+    'portfolio_github_rate_limit_remaining',
+    'Valor mais recente de X-RateLimit-Remaining da API do GitHub',
+    multiprocess_mode='mostrecent',
+)
+
+GITHUB_BUDGET_REMAINING = Gauge(
+    'portfolio_github_budget_remaining',
+    'Tokens restantes no orçamento compartilhado de chamadas ao GitHub',
+    multiprocess_mode='mostrecent',
+)
+
+GITHUB_BUDGET_DENIED = Counter(
+    'portfolio_github_budget_denied_total',
+    'Chamadas ao GitHub não feitas por falta de orçamento',
+    ['priority'],
+)
+
+CACHE_REQUESTS = Counter(
+    'portfolio_cache_requests_total',
+    'Consultas a caches internos por resultado (hit/miss)',
+    ['cache', 'result'],
+)
+
+LOGIN_THROTTLED = Counter(
+    'portfolio_login_throttled_total',
+    'Tentativas de login/cadastro recusadas pelo limite de tentativas',
+    ['scope'],
+)
+
+def record_cache(cache: str, hit: bool):
+    """
+    Registra um hit ou miss de cache
+    """
+    CACHE_REQUESTS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+def record_login_throttled(scope: str):
+    """
+    Conta uma tentativa recusada ('ip' ou 'account')
+    """
+    LOGIN_THROTTLED.labels(scope=scope).inc()
+
+def record_github_rate_limit(headers):
+    """
+    Atualiza o limite restante da API do GitHub a partir dos headers da resposta
+    """
+    remaining = headers.get('X-RateLimit-Remaining')
+    if remaining is not None:
+        try:
+            GITHUB_RATE_LIMIT_REMAINING.set(int(remaining))
+        except ValueError:
+            pass
+
+def record_github_budget(remaining: float, denied_priority: str = None):
+    """
+    Atualiza o saldo do orçamento do GitHub e conta chamadas negadas
+    """
+    GITHUB_BUDGET_REMAINING.set(remaining)
+    if denied_priority is not None:
+        GITHUB_BUDGET_DENIED.labels(priority=denied_priority).inc()
+
+def update_pool_stats(engine, role: str = 'primary'):
+    """
+    Atualiza as métricas do pool de conexões do SQLAlchemy ('primary' ou 'replica')
+    """
+    pool = engine.pool
+    # Pools como StaticPool/NullPool (SQLite) não expõem estas estatísticas
+    if not hasattr(pool, 'checkedout'):
+        return
+    DB_POOL_SIZE.labels(role).set(pool.size())
+    DB_POOL_CHECKED_OUT.labels(role).set(pool.checkedout())
+    DB_POOL_OVERFLOW.labels(role).set(max(pool.overflow(), 0))
+
+def collect_metrics() -> bytes:
+    """
+    Gera o texto de exposição, agregando os workers no modo multiprocesso
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+class Metrics:
+    """
+    Endpoint /metrics no formato do Prometheus
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_TOKEN', None)
+
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        app.extensions['metrics'] = self
+
+    def before_request(self):
+        g._metrics_started = time.perf_counter()
+
+    def after_request(self, response):
+        started = g.pop('_metrics_started', None)
+        if started is None or request.endpoint == 'metrics':
+            return response
+
+        # Rotas inexistentes ficam agrupadas para não explodir a cardinalidade
+        endpoint = request.endpoint or 'unmatched'
+        labels = (request.method, endpoint)
+
+        def observe():
+            REQUEST_COUNT.labels(*labels, response.status_code).inc()
+            REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+
+        # Em streaming o corpo ainda vai ser gerado: mede até o fim do envio
+        if response.is_streamed:
+            response.call_on_close(observe)
+        else:
+            observe()
+
+        db = current_app.extensions.get('sqlalchemy')
+        if db is not None:
+            for bind_key, engine in db.engines.items():
+                update_pool_stats(engine, bind_key or 'primary')
+        return response
+
+    def metrics_view(self):
+        token = current_app.config['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(403)
+        return Response(collect_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -1,8 +1,10 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
 from app import db
+from passwords import hash_password, needs_rehash
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -19,6 +21,7 @@ class User(UserMixin, db.Model):
     location = db.Column(db.String(100))
     profession = db.Column(db.String(100))
     is_admin = db.Column(db.Boolean, default=False)
+    session_version = db.Column(db.Integer, default=0)  # Bumped on password change
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -27,7 +30,23 @@ class User(UserMixin, db.Model):
     likes = db.relationship('Like', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        # Changing an existing password invalidates sessions created with the old one
+        if self.password_hash:
+            self.session_version = (self.session_version or 0) + 1
+            from user_cache import invalidate_user
+            invalidate_user(self.id)
+        self.password_hash = hash_password(password)
+    
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
+    
+    def rehash_password(self, password):
+        # Same password with the configured algorithm/cost: sessions stay valid
+        self.password_hash = hash_password(password)
+    
+    def get_id(self):
+        from user_cache import make_session_id
+        return make_session_id(self.id, self.session_version)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -48,12 +67,16 @@ class Project(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     content = db.Column(db.Text)
+    content_html = db.Column(db.Text)  # Markdown renderizado e sanitizado
+    content_hash = db.Column(db.String(64))  # Hash do content que gerou content_html
     image_path = db.Column(db.String(200))
     video_path = db.Column(db.String(200))
     demo_link = db.Column(db.String(500))
     github_link = db.Column(db.String(500))
     is_published = db.Column(db.Boolean, default=False)
     is_featured = db.Column(db.Boolean, default=False)
+    view_count = db.Column(db.Integer, default=0)
+    popularity_score = db.Column(db.Float, index=True)  # See popularity.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -61,6 +84,9 @@ class Project(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
     
+    # (author, title) identifies projects imported without an id; see bulk.py
+    __table_args__ = (db.Index('ix_project_user_title', 'user_id', 'title'),)
+    
     # Relationships
     tags = db.relationship('Tag', secondary='project_tags', backref=db.backref('projects', lazy=True))
     comments = db.relationship('Comment', backref='project', lazy=True, cascade='all, delete-orphan')
@@ -71,6 +97,35 @@ class Project(db.Model):
     
     def is_liked_by_user(self, user_id):
         return Like.query.filter_by(user_id=user_id, project_id=self.id).first() is not None
+    
+    def render_content(self):
+        """Re-render content_html if the Markdown source changed"""
+        from rendering import content_hash, render_markdown
+        if not self.content:
+            self.content_html = None
+            self.content_hash = None
+            return
+        digest = content_hash(self.content)
+        if digest != self.content_hash:
+            self.content_html = render_markdown(self.content)
+            self.content_hash = digest
+
+@event.listens_for(Project, 'before_insert')
+@event.listens_for(Project, 'before_update')
+def render_project_content(mapper, connection, project):
+    project.render_content()
+
+@event.listens_for(Project, 'before_insert')
+def init_project_popularity(mapper, connection, project):
+    from popularity import CREATED_WEIGHT, add_event
+    if project.popularity_score is None:
+        project.popularity_score = add_event(None, CREATED_WEIGHT, project.created_at)
+
+class RepositoryStats(db.Model):
+    """View counts and popularity for GitHub repositories shown on the site"""
+    key = db.Column(db.String(200), primary_key=True)  # owner/repo, lowercase
+    view_count = db.Column(db.Integer, default=0)
+    popularity_score = db.Column(db.Float, index=True)  # See popularity.py
 
 class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -115,3 +170,53 @@ class Notification(db.Model):
     # Relationships
     user = db.relationship('User', backref='notifications')
     project = db.relationship('Project', backref='notifications')
+    
+    # A user's notification list, and the retention sweep (see retention.py)
+    __table_args__ = (
+        db.Index('ix_notification_user_created', 'user_id', 'created_at'),
+        db.Index('ix_notification_read_created', 'is_read', 'created_at'),
+    )
+
+class NotificationRollup(db.Model):
+    """Monthly count of notifications removed by the retention sweep"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    period = db.Column(db.Date, nullable=False)  # First day of the month
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'period', name='unique_user_period_rollup'),)
+
+class TableSize(db.Model):
+    """Periodic sample of a table's size, to follow its growth over time"""
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(100), nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    total_bytes = db.Column(db.BigInteger)  # None when the database can't tell
+    sampled_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_table_size_name_sampled', 'table_name', 'sampled_at'),)
+
+class CacheStamp(db.Model):
+    """Version counter shared by all workers; bumping it invalidates the
+    in-process caches keyed by it on every worker"""
+    key = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Job(db.Model):
+    """Background job stored in the database; see jobs.py for the worker"""
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text)  # JSON kwargs
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(100))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    # The worker polls for (status, run_at)
+    __table_args__ = (db.Index('ix_job_status_run_at', 'status', 'run_at'),)
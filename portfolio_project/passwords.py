@@ -0,0 +1,31 @@
+from functools import lru_cache
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash
+
+# Algoritmo e custo do hash de senha, em PASSWORD_HASH_METHOD no formato do
+# Werkzeug ("scrypt:32768:8:1", "pbkdf2:sha256:600000"...). Vazio usa o
+# padrão do Werkzeug. Hashes antigos são refeitos no próximo login
+
+def hash_method():
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD')
+    return None
+
+def hash_password(password: str) -> str:
+    method = hash_method()
+    if method:
+        return generate_password_hash(password, method=method)
+    return generate_password_hash(password)
+
+@lru_cache(maxsize=8)
+def _method_prefix(method) -> str:
+    # O Werkzeug completa parâmetros omitidos ("pbkdf2" -> "pbkdf2:sha256:N");
+    # gerar um hash uma vez por processo dá a forma exata que ele grava
+    sample = generate_password_hash('', method=method) if method else generate_password_hash('')
+    return sample.split('$', 1)[0]
+
+def needs_rehash(password_hash: str) -> bool:
+    """
+    True se o hash foi gerado com outro algoritmo ou custo
+    """
+    return password_hash.split('$', 1)[0] != _method_prefix(hash_method())
@@ -0,0 +1,241 @@
+import os
+import math
+import atexit
+import threading
+import logging
+from collections import Counter
+from datetime import datetime
+import sqlalchemy as sa
+from cache import TTLCache, bump_stamp, get_stamp
+
+logger = logging.getLogger(__name__)
+
+# Pontuação de popularidade com decaimento exponencial guardada em escala
+# logarítmica: cada evento soma peso * e^(t / tau). Assim a pontuação nunca
+# precisa ser recalculada com o passar do tempo, e ordenar por ela equivale a
+# ordenar pela popularidade "decaída" de hoje
+EPOCH = datetime(2024, 1, 1)
+HALF_LIFE_DAYS = float(os.environ.get('POPULARITY_HALF_LIFE_DAYS', 7))
+DECAY_RATE = math.log(2) / (HALF_LIFE_DAYS * 86400)
+
+VIEW_WEIGHT = 1.0
+COMMENT_WEIGHT = 3.0
+LIKE_WEIGHT = 5.0
+CREATED_WEIGHT = 20.0  # Projetos novos começam com um impulso de recência
+
+RANKING_STAMP = 'popularity:repositories'
+
+def add_event(score, weight: float, when: datetime = None) -> float:
+    """
+    Soma um evento de peso `weight` a uma pontuação (None = sem eventos)
+    """
+    when = when or datetime.utcnow()
+    event = math.log(weight) + (when - EPOCH).total_seconds() * DECAY_RATE
+    if score is None:
+        return event
+    # log(e^a + e^b) sem estourar
+    high, low = max(score, event), min(score, event)
+    return high + math.log1p(math.exp(low - high))
+
+def remove_event(score, weight: float, when: datetime) -> float:
+    """
+    Desfaz um evento somado antes por add_event (mesmo peso e mesma data)
+    """
+    event = math.log(weight) + (when - EPOCH).total_seconds() * DECAY_RATE
+    # Só por arredondamento o evento passaria da pontuação (o impulso de
+    # criação nunca sai): nesse caso não há o que subtrair
+    if score is None or event >= score:
+        return score
+    # log(e^score - e^event)
+    return score + math.log(-math.expm1(event - score))
+
+def update_score(model, where, change, attempts: int = 10) -> float:
+    """
+    Aplica change(pontuação atual) -> nova pontuação na linha de `where`.
+    UPDATE condicional (compare-and-set): se outro worker mudou a pontuação
+    entre a leitura e a escrita, lê de novo e repete, sem perder o evento.
+    updated_at fica como está: popularidade não é edição do projeto
+    """
+    from app import db
+    table = model.__table__
+    score_column = table.c.popularity_score
+    values = {'updated_at': table.c.updated_at} if 'updated_at' in table.c else {}
+    for _ in range(attempts):
+        current = db.session.execute(sa.select(score_column).where(where)).scalar()
+        score = change(current)
+        unchanged = score_column.is_(None) if current is None else score_column == current
+        result = db.session.execute(
+            sa.update(table).where(where, unchanged).values(popularity_score=score, **values)
+        )
+        if result.rowcount:
+            return score
+    raise RuntimeError(f"Pontuação de {table.name} mudou {attempts} vezes durante a atualização")
+
+def add_project_event(project_id: int, weight: float, when: datetime = None) -> float:
+    """
+    Soma um evento à pontuação de um projeto no banco
+    """
+    from models import Project
+    return update_score(Project, Project.id == project_id, lambda score: add_event(score, weight, when))
+
+def remove_project_event(project_id: int, weight: float, when: datetime) -> float:
+    """
+    Tira da pontuação de um projeto um evento desfeito (ex.: descurtir)
+    """
+    from models import Project
+    return update_score(Project, Project.id == project_id, lambda score: remove_event(score, weight, when))
+
+def backfill_scores(batch_size: int = 500) -> int:
+    """
+    Calcula a pontuação dos projetos que ainda não têm (ex.: coluna recém
+    adicionada pelo init-db) a partir da criação, comentários e curtidas.
+    Retorna quantos projetos foram preenchidos
+    """
+    from app import db
+    from models import Comment, Like, Project
+
+    table = Project.__table__
+    filled = 0
+    while True:
+        projects = db.session.execute(
+            sa.select(table.c.id, table.c.created_at).where(table.c.popularity_score.is_(None))
+            .order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not projects:
+            return filled
+        scores = {project_id: add_event(None, CREATED_WEIGHT, created_at or EPOCH)
+                  for project_id, created_at in projects}
+        for model, weight in ((Comment, COMMENT_WEIGHT), (Like, LIKE_WEIGHT)):
+            events = db.session.execute(
+                sa.select(model.project_id, model.created_at).where(model.project_id.in_(list(scores)))
+            )
+            for project_id, created_at in events:
+                scores[project_id] = add_event(scores[project_id], weight, created_at or EPOCH)
+        # updated_at = updated_at: preencher a pontuação não é edição
+        db.session.execute(
+            sa.update(table)
+            .where(table.c.id == sa.bindparam('b_id'))
+            .values(popularity_score=sa.bindparam('b_score'), updated_at=table.c.updated_at),
+            [{'b_id': project_id, 'b_score': score} for project_id, score in scores.items()],
+        )
+        db.session.commit()
+        filled += len(scores)
+
+def repository_key(owner: str, repo_name: str) -> str:
+    return f"{owner.lower()}/{repo_name.lower()}"
+
+class ViewCounter:
+    """
+    Contador de visualizações com escrita adiada: os incrementos ficam em
+    memória e uma thread do worker grava tudo no banco a cada
+    VIEW_FLUSH_INTERVAL segundos, em lote
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('VIEW_FLUSH_INTERVAL', 30)
+        self.app = app
+        app.extensions['view_counter'] = self
+        atexit.register(self.flush)
+
+    def increment(self, key: str, amount: int = 1):
+        with self._lock:
+            self._pending[key] += amount
+        self._ensure_thread()
+
+    def _ensure_thread(self):
+        # A thread não sobrevive ao fork do gunicorn: cada worker inicia a sua
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = self.app.config['VIEW_FLUSH_INTERVAL']
+        stop = threading.Event()
+        while not stop.wait(interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Erro ao gravar visualizações: {e}")
+
+    def flush(self):
+        """
+        Grava os incrementos acumulados. Retorna quantas chaves foram gravadas
+        """
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending or self.app is None:
+            return 0
+
+        try:
+            with self.app.app_context():
+                flush_repository_views(pending)
+        except Exception:
+            # Devolve ao buffer para a próxima tentativa
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        return len(pending)
+
+def flush_repository_views(pending):
+    """
+    Aplica um lote de visualizações {chave: quantidade} em RepositoryStats e
+    nos projetos cadastrados que apontam para o mesmo repositório
+    """
+    from app import db
+    from models import Project, RepositoryStats
+
+    now = datetime.utcnow()
+    keys = list(pending)
+    # Incrementos no próprio UPDATE: outros workers gravam os seus lotes ao mesmo tempo
+    existing = set(db.session.scalars(sa.select(RepositoryStats.key).where(RepositoryStats.key.in_(keys))))
+    for key, views in pending.items():
+        if key not in existing:
+            db.session.add(RepositoryStats(key=key, view_count=views,
+                                           popularity_score=add_event(None, VIEW_WEIGHT * views, now)))
+            continue
+        where = RepositoryStats.key == key
+        db.session.execute(sa.update(RepositoryStats).where(where)
+                           .values(view_count=sa.func.coalesce(RepositoryStats.view_count, 0) + views))
+        update_score(RepositoryStats, where, lambda score: add_event(score, VIEW_WEIGHT * views, now))
+
+    urls = {f"https://github.com/{key}": key for key in keys}
+    linked = db.session.execute(
+        sa.select(Project.id, Project.github_link).where(db.func.lower(Project.github_link).in_(list(urls)))
+    ).all()
+    for project_id, github_link in linked:
+        views = pending[urls[github_link.lower()]]
+        db.session.execute(sa.update(Project).where(Project.id == project_id).values(
+            view_count=sa.func.coalesce(Project.view_count, 0) + views, updated_at=Project.updated_at))
+        add_project_event(project_id, VIEW_WEIGHT * views, now)
+
+    bump_stamp(RANKING_STAMP)
+    db.session.commit()
+
+_ranking_cache = TTLCache('popularity', ttl=3600, maxsize=4)
+
+def get_repository_ranking() -> dict:
+    """
+    Posição de cada repositório por popularidade, {chave: posição}.
+    Calculada uma vez por gravação de lote, não a cada requisição
+    """
+    def load():
+        from models import RepositoryStats
+        ordered = RepositoryStats.query.order_by(RepositoryStats.popularity_score.desc().nullslast()).all()
+        return {stats.key: position for position, stats in enumerate(ordered)}
+    return _ranking_cache.get_or_set(get_stamp(RANKING_STAMP), load)
+
+view_counter = ViewCounter()
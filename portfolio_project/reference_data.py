@@ -0,0 +1,44 @@
+from collections import namedtuple
+from cache import TTLCache, bump_stamp, get_stamp
+
+# Cópias imutáveis: podem ser compartilhadas entre requisições e threads sem
+# ficar presas a uma sessão do SQLAlchemy
+CategoryRef = namedtuple('CategoryRef', ['id', 'name', 'color'])
+
+CATEGORIES_STAMP = 'reference:categories'
+TAGS_STAMP = 'reference:tags'
+
+# A versão em CacheStamp faz parte da chave, então o TTL só limita a memória
+_reference_cache = TTLCache('reference', ttl=3600, maxsize=16)
+
+def get_categories():
+    """
+    Todas as categorias, sem consultar a tabela enquanto a versão não mudar
+    """
+    def load():
+        from models import Category
+        return tuple(CategoryRef(c.id, c.name, c.color)
+                     for c in Category.query.order_by(Category.id).all())
+    return _reference_cache.get_or_set(('categories', get_stamp(CATEGORIES_STAMP)), load)
+
+def get_tag_ids():
+    """
+    Mapa {nome da tag: id}
+    """
+    def load():
+        from app import db
+        from models import Tag
+        return dict(db.session.query(Tag.name, Tag.id).all())
+    return _reference_cache.get_or_set(('tags', get_stamp(TAGS_STAMP)), load)
+
+def invalidate_categories():
+    """
+    Chamado na mesma transação de qualquer escrita em Category
+    """
+    bump_stamp(CATEGORIES_STAMP)
+
+def invalidate_tags():
+    """
+    Chamado na mesma transação que cria tags novas
+    """
+    bump_stamp(TAGS_STAMP)
@@ -0,0 +1,58 @@
+import hashlib
+import threading
+import markdown
+import nh3
+from cache import TTLCache
+
+# HTML permitido depois da renderização do Markdown (READMEs e conteúdo de projetos)
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt',
+    'em', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p',
+    'pre', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'th', 'thead',
+    'tr', 'ul',
+}
+
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'code': {'class'},
+    'span': {'class'},
+    'div': {'class'},
+    'th': {'align'},
+    'td': {'align'},
+}
+
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists']
+
+# Uma instância reaproveitada (carregar as extensões é caro); não é thread-safe
+_markdown = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, output_format='html')
+_markdown_lock = threading.Lock()
+
+# O resultado só depende do texto, então o hash do conteúdo é a chave
+_render_cache = TTLCache('markdown', ttl=24 * 3600, maxsize=256)
+
+def content_hash(text: str) -> str:
+    """
+    Hash SHA-256 do texto-fonte, usado para saber se é preciso renderizar de novo
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def render_markdown(text: str) -> str:
+    """
+    Converte Markdown em HTML sanitizado, reaproveitando renderizações anteriores
+    do mesmo conteúdo
+    """
+    if not text:
+        return ''
+    return _render_cache.get_or_set(content_hash(text), lambda: _render(text))
+
+def _render(text: str) -> str:
+    with _markdown_lock:
+        html = _markdown.reset().convert(text)
+    return nh3.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes={'http', 'https', 'mailto'},
+        link_rel='noopener noreferrer nofollow',
+    )
@@ -0,0 +1,101 @@
+import time
+from functools import wraps
+import click
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+# Leituras de rotas públicas podem ir para uma réplica (bind 'replica').
+# Escritas, e as requisições de quem acabou de escrever, vão para o primário
+REPLICA_BIND = 'replica'
+
+class RoutingSession(Session):
+    """
+    Sessão que manda SELECTs para a réplica quando a rota pediu (use_replica).
+    Flush, INSERT/UPDATE/DELETE e SQL textual sempre vão para o primário
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and _replica_requested()
+                and isinstance(clause, sa.sql.Select)):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _replica_requested() -> bool:
+    return has_request_context() and g.get('_db_replica', False)
+
+def use_replica(view):
+    """
+    Serve a rota (só GET) pela réplica, exceto logo depois de o próprio
+    usuário ter escrito algo: aí ele lê do primário e vê o que acabou de fazer
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method == 'GET' and session.get('_db_primary_until', 0) < time.time():
+            g._db_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+class ReadReplica:
+    """
+    Marca na sessão do usuário quando a requisição escreveu no banco, para as
+    próximas leituras dele ficarem no primário por REPLICA_STICKY_SECONDS
+    (cobre o atraso de replicação)
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REPLICA_STICKY_SECONDS', 5)
+        if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+            return
+        app.after_request(self.after_request)
+        app.extensions['read_replica'] = self
+
+    def after_request(self, response):
+        if g.pop('_db_wrote', False):
+            session['_db_primary_until'] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+        return response
+
+@sa.event.listens_for(Session, 'after_flush')
+def _mark_write(db_session, flush_context):
+    if has_request_context():
+        g._db_wrote = True
+
+@sa.event.listens_for(Session, 'do_orm_execute')
+def _mark_orm_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write(orm_execute_state.session, None)
+
+def pool_options(config, role: str) -> dict:
+    """
+    Tamanho do pool de um papel ('PRIMARY' ou 'REPLICA'). Cada worker do
+    gunicorn tem o seu pool: o total de conexões é workers x (pool + overflow)
+    """
+    options = {}
+    for key, option in (('POOL_SIZE', 'pool_size'), ('MAX_OVERFLOW', 'max_overflow'),
+                        ('POOL_TIMEOUT', 'pool_timeout')):
+        value = config.get(f'DB_{role}_{key}')
+        if value is not None:
+            options[option] = value
+    return options
+
+@click.command('sync-replica')
+def sync_replica_command():
+    """Copia o banco primário para a réplica (só SQLite; para testes locais)."""
+    from app import db
+    primary, replica = db.engines[None], db.engines.get(REPLICA_BIND)
+    if replica is None or primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise click.ClickException('Defina DATABASE_REPLICA_URL com dois bancos SQLite.')
+    source = primary.raw_connection()
+    target = replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        source.close()
+        target.close()
+    click.echo('Réplica atualizada.')
@@ -0,0 +1,158 @@
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+import click
+import sqlalchemy as sa
+from flask import current_app
+from flask.cli import AppGroup
+from app import db
+
+# Retenção de notificações: as lidas mais antigas que
+# NOTIFICATION_RETENTION_DAYS viram uma contagem mensal por usuário
+# (NotificationRollup) e são apagadas em lotes pequenos, um commit por lote,
+# para nunca segurar a tabela por muito tempo. Não lidas nunca são apagadas.
+# Rodar uma vez por dia (cron / agendador da plataforma):
+#
+#     flask notifications prune
+
+# Tabelas cujo tamanho é amostrado a cada limpeza (TableSize)
+TRACKED_TABLES = ('notification', 'notification_rollup', 'job')
+
+notifications_cli = AppGroup('notifications', help='Retenção de notificações.')
+
+def expired_filter(older_than_days: int):
+    from models import Notification
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    return db.and_(Notification.is_read.is_(True), Notification.created_at < cutoff)
+
+def _add_to_rollups(rows):
+    """
+    Soma as notificações de um lote às contagens mensais, na mesma transação
+    que as apaga
+    """
+    from models import NotificationRollup
+
+    counts = Counter((row.user_id, date(row.created_at.year, row.created_at.month, 1)) for row in rows)
+    existing = NotificationRollup.query.filter(
+        NotificationRollup.user_id.in_({user_id for user_id, _ in counts}),
+        NotificationRollup.period.in_({period for _, period in counts}),
+    )
+    for rollup in existing:
+        key = (rollup.user_id, rollup.period)
+        if key in counts:
+            rollup.count += counts.pop(key)
+    for (user_id, period), count in counts.items():
+        db.session.add(NotificationRollup(user_id=user_id, period=period, count=count))
+
+def prune_notifications(older_than_days: int = None, batch_size: int = None, pause: float = None) -> int:
+    """
+    Apaga as notificações lidas e antigas em lotes. Retorna quantas saíram
+    """
+    from models import Notification
+
+    config = current_app.config
+    older_than_days = config['NOTIFICATION_RETENTION_DAYS'] if older_than_days is None else older_than_days
+    batch_size = batch_size or config['NOTIFICATION_RETENTION_BATCH']
+    pause = config['NOTIFICATION_RETENTION_PAUSE'] if pause is None else pause
+    expired = expired_filter(older_than_days)
+
+    removed = 0
+    while True:
+        rows = (db.session.query(Notification.id, Notification.user_id, Notification.created_at)
+                .filter(expired).order_by(Notification.id).limit(batch_size).all())
+        if not rows:
+            break
+        _add_to_rollups(rows)
+        db.session.execute(
+            sa.delete(Notification).where(Notification.id.in_([row.id for row in rows])),
+            execution_options={'synchronize_session': False},
+        )
+        db.session.commit()
+        removed += len(rows)
+        if len(rows) < batch_size:
+            break
+        # Entre um lote e outro as requisições que esperavam pela escrita passam
+        time.sleep(pause)
+    return removed
+
+def table_bytes(table_name: str):
+    """
+    Espaço ocupado pela tabela e seus índices, ou None se o banco não informar
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return db.session.execute(sa.text('SELECT pg_total_relation_size(:name)'),
+                                  {'name': table_name}).scalar()
+    if dialect == 'sqlite':
+        # dbstat só existe se o SQLite foi compilado com ela
+        try:
+            return db.session.execute(sa.text(
+                'SELECT SUM(pgsize) FROM dbstat WHERE name IN '
+                '(SELECT name FROM sqlite_master WHERE tbl_name = :name)'
+            ), {'name': table_name}).scalar()
+        except sa.exc.OperationalError:
+            return None
+    return None
+
+def record_table_sizes():
+    """
+    Guarda uma amostra do tamanho de cada tabela acompanhada
+    """
+    from models import TableSize
+
+    samples = []
+    for table_name in TRACKED_TABLES:
+        table = db.metadata.tables[table_name]
+        row_count = db.session.execute(sa.select(sa.func.count()).select_from(table)).scalar()
+        samples.append(TableSize(table_name=table_name, row_count=row_count,
+                                 total_bytes=table_bytes(table_name)))
+    db.session.add_all(samples)
+    db.session.commit()
+    return samples
+
+def _format_bytes(value):
+    if value is None:
+        return '-'
+    for unit in ('B', 'KiB', 'MiB'):
+        if value < 1024:
+            return f'{value:.0f} {unit}'
+        value /= 1024
+    return f'{value:.1f} GiB'
+
+@notifications_cli.command('prune')
+@click.option('--days', type=int, help='Idade mínima em dias (padrão: NOTIFICATION_RETENTION_DAYS).')
+@click.option('--batch-size', type=int, help='Notificações por lote (padrão: NOTIFICATION_RETENTION_BATCH).')
+@click.option('--dry-run', is_flag=True, help='Só conta o que seria apagado.')
+def prune_command(days, batch_size, dry_run):
+    """Consolida e apaga notificações lidas antigas."""
+    from models import Notification
+
+    if dry_run:
+        days = current_app.config['NOTIFICATION_RETENTION_DAYS'] if days is None else days
+        count = db.session.query(sa.func.count(Notification.id)).filter(expired_filter(days)).scalar()
+        click.echo(f'{count} notificações seriam apagadas')
+        return
+    started = time.perf_counter()
+    removed = prune_notifications(older_than_days=days, batch_size=batch_size)
+    click.echo(f'{removed} notificações apagadas em {time.perf_counter() - started:.1f}s')
+    for sample in record_table_sizes():
+        click.echo(f'{sample.table_name:<20} {sample.row_count:>10} linhas  {_format_bytes(sample.total_bytes)}')
+
+@notifications_cli.command('sizes')
+@click.option('--table', type=click.Choice(TRACKED_TABLES), default='notification')
+@click.option('--limit', default=30, help='Quantas amostras mostrar.')
+@click.option('--sample', is_flag=True, help='Mede as tabelas agora antes de mostrar.')
+def sizes_command(table, limit, sample):
+    """Histórico de tamanho de uma tabela (uma amostra por limpeza)."""
+    from models import TableSize
+
+    if sample:
+        record_table_sizes()
+    samples = (TableSize.query.filter_by(table_name=table)
+               .order_by(TableSize.sampled_at.desc()).limit(limit).all())
+    previous = None
+    for row in reversed(samples):
+        change = '' if previous is None else f'{row.row_count - previous.row_count:+d}'
+        click.echo(f'{row.sampled_at:%Y-%m-%d %H:%M}  {row.row_count:>10} linhas {change:>8}  '
+                   f'{_format_bytes(row.total_bytes)}')
+        previous = row
@@ -1,106 +1,153 @@
 import os
 from datetime import datetime
-from flask import render_template, redirect, url_for, flash, request, jsonify, send_from_directory
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request, jsonify, send_from_directory, make_response
 from flask_login import login_user, logout_user, login_required, current_user
 from urllib.parse import urlparse as url_parse
-from app import app, db
+from app import db
 from models import User, Project, Category, Tag, Comment, Like, Notification, project_tags
 from forms import LoginForm, RegisterForm, ProjectForm, CommentForm, ProfileForm, CategoryForm
-from utils import save_uploaded_file, create_notification, format_date
+from utils import save_uploaded_file, create_notification, format_date, get_or_create_tags
+from reference_data import get_categories, invalidate_categories
+from user_cache import invalidate_user
+from popularity import COMMENT_WEIGHT, LIKE_WEIGHT, add_project_event, remove_project_event, get_repository_ranking, repository_key, view_counter
 from github_api import create_github_client
+from streaming import Deferred, render_page
+from replica import use_replica
+from throttle import login_throttle
+
+bp = Blueprint('main', __name__)
 
 # Template filter
-@app.template_filter('time_ago')
+@bp.app_template_filter('time_ago')
 def time_ago_filter(date):
     return format_date(date)
 
 # Static file serving
-@app.route('/uploads/<path:filename>')
+@bp.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
 
 # Home page / Feed
-@app.route('/')
+@bp.route('/')
+@use_replica
 def index():
     category_filter = request.args.get('category', type=int)
     
     # Criar cliente GitHub
     github_client = create_github_client()
     
-    # Obter projetos fixados do GitHub
-    try:
-        github_projects = github_client.get_pinned_repositories_details()
-        projects = []
+    def load_projects():
+        # Obter projetos fixados do GitHub
+        try:
+            github_projects = github_client.get_pinned_repositories_details()
+            if not github_projects:
+                # Ex.: orçamento de chamadas esgotado e nada em cache
+                raise RuntimeError("Nenhum repositório disponível")
+            projects = []
         
-        for github_repo in github_projects:
-            # Criar objeto Project temporário com dados do GitHub
-            project = Project(
-                title=github_repo.get('name', '').replace('-', ' ').replace('_', ' ').title(),
-                description=github_repo.get('description', 'Projeto do GitHub') or f"Projeto interessante: {github_repo.get('name', '')}",
-                github_link=github_repo.get('html_url', ''),
-                demo_link=github_repo.get('homepage') if github_repo.get('homepage') else None,
-                is_published=True,
-                is_featured=True
-            )
-            
-            # Adicionar informações extras como atributos temporários
-            project.github_stars = github_repo.get('stargazers_count', 0)
-            project.github_forks = github_repo.get('forks_count', 0)
-            project.github_language = github_repo.get('language', 'N/A')
-            project.github_updated = github_repo.get('updated_at', '')
-            
-            projects.append(project)
-            
-    except Exception as e:
-        app.logger.error(f"Erro ao buscar projetos do GitHub: {e}")
-        # Fallback para projetos estáticos em caso de erro
-        pinned_project_names = ["Biblioteca", "Spectra", "Site-com-bootstrap", "Sistema-Solar", "Exercicios-JS"]
-        projects = []
-        for name in pinned_project_names:
-            project = Project(
-                title=name.replace("-", " ").replace("_", " ").title(),
-                description=f"Um projeto interessante do GitHub: {name}",
-                github_link=f"https://github.com/EdGomes234/{name}",
-                is_published=True,
-                is_featured=True
-            )
-            projects.append(project)
+            for github_repo in github_projects:
+                # Criar objeto Project temporário com dados do GitHub
+                project = Project(
+                    title=github_repo.get('name', '').replace('-', ' ').replace('_', ' ').title(),
+                    description=github_repo.get('description', 'Projeto do GitHub') or f"Projeto interessante: {github_repo.get('name', '')}",
+                    github_link=github_repo.get('html_url', ''),
+                    demo_link=github_repo.get('homepage') if github_repo.get('homepage') else None,
+                    is_published=True,
+                    is_featured=True
+                )
+        
+                # Adicionar informações extras como atributos temporários
+                project.github_stars = github_repo.get('stargazers_count', 0)
+                project.github_forks = github_repo.get('forks_count', 0)
+                project.github_language = github_repo.get('language', 'N/A')
+                project.github_updated = github_repo.get('updated_at', '')
+                project.slug = github_repo.get('name', '')
+        
+                projects.append(project)
+        
+        except Exception as e:
+            current_app.logger.error(f"Erro ao buscar projetos do GitHub: {e}")
+            # Fallback para projetos estáticos em caso de erro
+            pinned_project_names = ["Biblioteca", "Spectra", "Site-com-bootstrap", "Sistema-Solar", "Exercicios-JS"]
+            projects = []
+            for name in pinned_project_names:
+                project = Project(
+                    title=name.replace("-", " ").replace("_", " ").title(),
+                    description=f"Um projeto interessante do GitHub: {name}",
+                    github_link=f"https://github.com/EdGomes234/{name}",
+                    is_published=True,
+                    is_featured=True
+                )
+                project.slug = name
+                projects.append(project)
+        
+        # Ordena pela popularidade pré-calculada; repositórios sem visitas mantêm a ordem fixada
+        ranking = get_repository_ranking()
+        projects.sort(key=lambda p: ranking.get(repository_key(github_client.username, p.slug), len(ranking)))
+        return projects
+    
+    # Buscado só quando o template chega na seção de projetos: em modo
+    # streaming, o topo da página já foi enviado enquanto o GitHub responde
+    projects = Deferred(load_projects)
     
     # Get categories for filter (still needed for other parts of the site, if any)
-    categories = Category.query.all()
+    categories = get_categories()
     
     # Featured projects will be the pinned projects for now
     featured_projects = projects
     
-    return render_template('index.html', projects=projects, categories=categories, 
-                         featured_projects=featured_projects, current_category=category_filter)
+    return render_page('index.html', projects=projects, categories=categories, 
+                       featured_projects=featured_projects, current_category=category_filter)
 
 # Authentication
-@app.route('/login', methods=['GET', 'POST'])
+def throttled_response(template, form, wait):
+    flash(f'Muitas tentativas. Tente novamente em {wait} segundos.', 'error')
+    response = make_response(render_template(template, form=form), 429)
+    response.headers['Retry-After'] = str(wait)
+    return response
+
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     form = LoginForm()
     if form.validate_on_submit():
+        # Checado antes do hash da senha: tentativas em excesso não gastam CPU
+        wait = login_throttle.retry_after('login', form.email.data)
+        if wait:
+            return throttled_response('login.html', form, wait)
+        login_throttle.record_attempt('login')
+        
         user = User.query.filter_by(email=form.email.data).first()
         if user and user.check_password(form.password.data):
+            login_throttle.reset_account(form.email.data)
+            # Hash antigo (algoritmo ou custo mudou): refaz com a senha em mãos
+            if user.password_needs_rehash():
+                user.rehash_password(form.password.data)
+                db.session.commit()
             login_user(user, remember=form.remember_me.data)
             next_page = request.args.get('next')
             if not next_page or url_parse(next_page).netloc != '':
-                next_page = url_for('index')
+                next_page = url_for('main.index')
             flash('Login realizado com sucesso!', 'success')
             return redirect(next_page)
+        login_throttle.record_failure(form.email.data)
         flash('Email ou senha incorretos.', 'error')
     return render_template('login.html', form=form)
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     form = RegisterForm()
     if form.validate_on_submit():
+        wait = login_throttle.retry_after('register')
+        if wait:
+            return throttled_response('register.html', form, wait)
+        login_throttle.record_attempt('register')
+        
         user = User(
             username=form.username.data,
             email=form.email.data,
@@ -111,69 +158,73 @@ def register():
         db.session.add(user)
         db.session.commit()
         flash('Cadastro realizado com sucesso!', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     return render_template('register.html', form=form)
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('Logout realizado com sucesso!', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 # Profile
-@app.route('/profile')
+@bp.route('/profile')
 @login_required
 def profile():
+    user = db.session.get(User, current_user.id)
     user_projects = Project.query.filter_by(user_id=current_user.id).order_by(Project.created_at.desc()).all()
-    return render_template('profile.html', user_projects=user_projects)
+    return render_template('profile.html', user=user, user_projects=user_projects)
 
-@app.route('/edit_profile', methods=['GET', 'POST'])
+@bp.route('/edit_profile', methods=['GET', 'POST'])
 @login_required
 def edit_profile():
+    # current_user é um snapshot somente leitura; para alterar, carregamos o User completo
+    user = db.session.get(User, current_user.id)
     form = ProfileForm()
     if form.validate_on_submit():
-        current_user.first_name = form.first_name.data
-        current_user.last_name = form.last_name.data
-        current_user.bio = form.bio.data
-        current_user.profession = form.profession.data
-        current_user.location = form.location.data
-        current_user.linkedin_url = form.linkedin_url.data
-        current_user.github_url = form.github_url.data
-        current_user.website_url = form.website_url.data
+        user.first_name = form.first_name.data
+        user.last_name = form.last_name.data
+        user.bio = form.bio.data
+        user.profession = form.profession.data
+        user.location = form.location.data
+        user.linkedin_url = form.linkedin_url.data
+        user.github_url = form.github_url.data
+        user.website_url = form.website_url.data
         
         if form.profile_image.data:
             image_path = save_uploaded_file(form.profile_image.data, 'profiles')
             if image_path:
-                current_user.profile_image = image_path
+                user.profile_image = image_path
         
+        invalidate_user(user.id)
         db.session.commit()
         flash('Perfil atualizado com sucesso!', 'success')
-        return redirect(url_for('profile'))
+        return redirect(url_for('main.profile'))
     
     # Pre-populate form
     if request.method == 'GET':
-        form.first_name.data = current_user.first_name
-        form.last_name.data = current_user.last_name
-        form.bio.data = current_user.bio
-        form.profession.data = getattr(current_user, 'profession', None)
-        form.location.data = getattr(current_user, 'location', None)
-        form.linkedin_url.data = getattr(current_user, 'linkedin_url', None)
-        form.github_url.data = getattr(current_user, 'github_url', None)
-        form.website_url.data = getattr(current_user, 'website_url', None)
-    
-    return render_template('profile.html', form=form, edit_mode=True)
+        form.first_name.data = user.first_name
+        form.last_name.data = user.last_name
+        form.bio.data = user.bio
+        form.profession.data = getattr(user, 'profession', None)
+        form.location.data = getattr(user, 'location', None)
+        form.linkedin_url.data = getattr(user, 'linkedin_url', None)
+        form.github_url.data = getattr(user, 'github_url', None)
+        form.website_url.data = getattr(user, 'website_url', None)
+    
+    return render_template('profile.html', form=form, user=user, edit_mode=True)
 
 # Admin Dashboard
-@app.route('/admin')
+@bp.route('/admin')
 @login_required
 def admin_dashboard():
     if not current_user.is_admin:
         flash('Acesso negado. Apenas administradores podem acessar esta área.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     user_projects = Project.query.filter_by(user_id=current_user.id).order_by(Project.created_at.desc()).all()
-    categories = Category.query.all()
+    categories = get_categories()
     
     # Statistics
     total_projects = len(user_projects)
@@ -192,12 +243,12 @@ def admin_dashboard():
                          categories=categories, stats=stats)
 
 # Project CRUD
-@app.route('/admin/project/new', methods=['GET', 'POST'])
+@bp.route('/admin/project/new', methods=['GET', 'POST'])
 @login_required
 def new_project():
     if not current_user.is_admin:
         flash('Acesso negado. Apenas administradores podem criar projetos.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     form = ProjectForm()
     if form.validate_on_submit():
         project = Project(
@@ -232,32 +283,26 @@ def new_project():
         # Handle tags
         if form.tags.data:
             tag_names = [name.strip() for name in form.tags.data.split(',') if name.strip()]
-            for tag_name in tag_names:
-                tag = Tag.query.filter_by(name=tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                    db.session.flush()
-                project.tags.append(tag)
+            project.tags.extend(get_or_create_tags(tag_names))
         
         db.session.commit()
         flash('Projeto criado com sucesso!', 'success')
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
     
     return render_template('admin_project_form.html', form=form, title='Novo Projeto')
 
-@app.route('/admin/project/<int:id>/edit', methods=['GET', 'POST'])
+@bp.route('/admin/project/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_project(id):
     if not current_user.is_admin:
         flash('Acesso negado. Apenas administradores podem editar projetos.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     project = Project.query.get_or_404(id)
     
     # Check if user owns this project
     if project.user_id != current_user.id:
         flash('Você não tem permissão para editar este projeto.', 'error')
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
     
     form = ProjectForm(obj=project)
     
@@ -291,17 +336,11 @@ def edit_project(id):
         project.tags.clear()
         if form.tags.data:
             tag_names = [name.strip() for name in form.tags.data.split(',') if name.strip()]
-            for tag_name in tag_names:
-                tag = Tag.query.filter_by(name=tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                    db.session.flush()
-                project.tags.append(tag)
+            project.tags.extend(get_or_create_tags(tag_names))
         
         db.session.commit()
         flash('Projeto atualizado com sucesso!', 'success')
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
     
     # Pre-populate tags field
     if request.method == 'GET':
@@ -310,55 +349,74 @@ def edit_project(id):
     return render_template('admin_project_form.html', form=form, project=project, 
                          title='Editar Projeto')
 
-@app.route('/admin/project/<int:id>/delete', methods=['POST'])
+@bp.route('/admin/project/<int:id>/delete', methods=['POST'])
 @login_required
 def delete_project(id):
     if not current_user.is_admin:
         flash('Acesso negado. Apenas administradores podem excluir projetos.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     project = Project.query.get_or_404(id)
     
     # Check if user owns this project
     if project.user_id != current_user.id:
         flash('Você não tem permissão para excluir este projeto.', 'error')
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
     
     # Delete associated files
-    if project.image_path and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], project.image_path)):
-        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], project.image_path))
+    if project.image_path and os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], project.image_path)):
+        os.remove(os.path.join(current_app.config['UPLOAD_FOLDER'], project.image_path))
     
-    if project.video_path and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], project.video_path)):
-        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], project.video_path))
+    if project.video_path and os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], project.video_path)):
+        os.remove(os.path.join(current_app.config['UPLOAD_FOLDER'], project.video_path))
     
     db.session.delete(project)
     db.session.commit()
     flash('Projeto excluído com sucesso!', 'success')
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
 # Project Detail
-@app.route('/project/<int:id>')
-def project_detail(id):
+@bp.route('/project/<int:id>')
+def project_detail_by_id(id):
+    # URLs antigas usavam a posição na lista de fixados; redireciona para o slug
+    pinned_repos = create_github_client().get_pinned_repositories()
+    if id < 1 or id > len(pinned_repos):
+        flash('Projeto não encontrado.', 'error')
+        return redirect(url_for('main.index'))
+    return redirect(url_for('main.project_detail', slug=pinned_repos[id - 1]), code=301)
+
+@bp.route('/project/<slug>')
+@use_replica
+def project_detail(slug):
     # Criar cliente GitHub
     github_client = create_github_client()
     
+    # Só repositórios fixados têm página de detalhes
+    repo_name = github_client.find_pinned_repository(slug)
+    if repo_name is None:
+        flash('Projeto não encontrado.', 'error')
+        return redirect(url_for('main.index'))
+    if repo_name != slug:
+        return redirect(url_for('main.project_detail', slug=repo_name), code=301)
+    
     try:
-        # Obter projetos fixados do GitHub
-        github_projects = github_client.get_pinned_repositories_details()
-        
-        # Verificar se o ID está dentro do range válido
-        if id < 1 or id > len(github_projects):
+        # Obter apenas este repositório (em cache) e seu README
+        github_repo = github_client.get_repository(repo_name)
+        if not github_repo:
             flash('Projeto não encontrado.', 'error')
-            return redirect(url_for('index'))
-        
-        # Obter o projeto específico (ID é 1-based)
-        github_repo = github_projects[id - 1]
+            return redirect(url_for('main.index'))
+        # O README pode exigir uma chamada ao GitHub: fica para quando o
+        # template chegar no conteúdo
+        readme = Deferred(lambda: github_client.get_readme_parts(repo_name))
+        readme_source = Deferred(lambda: readme.get()['source'])
+        readme_html = Deferred(lambda: readme.get()['html'])
         
         # Criar objeto Project temporário com dados do GitHub
         project = Project(
-            id=id,  # ID temporário
+            id=github_client.get_pinned_repositories().index(repo_name) + 1,  # ID temporário
             title=github_repo.get('name', '').replace('-', ' ').replace('_', ' ').title(),
             description=github_repo.get('description', 'Projeto do GitHub') or f"Projeto interessante: {github_repo.get('name', '')}",
-            content=github_repo.get('readme', '')[:500] + '...' if github_repo.get('readme') else None,
+            content=readme_source,
+            content_html=readme_html,
             github_link=github_repo.get('html_url', ''),
             demo_link=github_repo.get('homepage') if github_repo.get('homepage') else None,
             is_published=True,
@@ -368,10 +426,15 @@ def project_detail(id):
         )
         
         # Adicionar informações extras como atributos temporários
+        project.slug = repo_name
         project.github_stars = github_repo.get('stargazers_count', 0)
         project.github_forks = github_repo.get('forks_count', 0)
         project.github_language = github_repo.get('language', 'N/A')
         project.github_updated = github_repo.get('updated_at', '')
+        # Entra na chave do trecho em cache do conteúdo (README), junto da data.
+        # Sem o README no cache a busca pode falhar: o trecho não é guardado
+        project.content_version = (github_client.repository_version(repo_name)
+                                   if github_client.has_cached_readme(repo_name) else None)
         
         # Simular comentários e curtidas (em uma implementação real, estes viriam do banco)
         project.comments = []
@@ -388,16 +451,19 @@ def project_detail(id):
         project.is_liked_by_user = is_liked_by_user
         
     except Exception as e:
-        app.logger.error(f"Erro ao buscar projeto do GitHub: {e}")
+        current_app.logger.error(f"Erro ao buscar projeto do GitHub: {e}")
         flash('Projeto não encontrado.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
+    
+    # Contagem em memória; gravada no banco em lote (ver popularity.py)
+    view_counter.increment(repository_key(github_client.username, repo_name))
     
     comment_form = CommentForm()
     
-    return render_template('project_detail.html', project=project, comment_form=comment_form)
+    return render_page('project_detail.html', project=project, comment_form=comment_form)
 
 # Comments
-@app.route('/project/<int:id>/comment', methods=['POST'])
+@bp.route('/project/<int:id>/comment', methods=['POST'])
 @login_required
 def add_comment(id):
     project = Project.query.get_or_404(id)
@@ -410,6 +476,7 @@ def add_comment(id):
             project_id=project.id
         )
         db.session.add(comment)
+        add_project_event(project.id, COMMENT_WEIGHT)
         
         # Create notification for project owner
         if project.user_id != current_user.id:
@@ -423,10 +490,10 @@ def add_comment(id):
             for error in errors:
                 flash(f'Erro no campo {field}: {error}', 'error')
     
-    return redirect(url_for('project_detail', id=id))
+    return redirect(url_for('main.project_detail_by_id', id=id))
 
 # Likes (AJAX)
-@app.route('/project/<int:id>/like', methods=['POST'])
+@bp.route('/project/<int:id>/like', methods=['POST'])
 @login_required
 def toggle_like(id):
     project = Project.query.get_or_404(id)
@@ -435,14 +502,16 @@ def toggle_like(id):
     existing_like = Like.query.filter_by(user_id=current_user.id, project_id=project.id).first()
     
     if existing_like:
-        # Unlike
+        # Unlike: desfaz exatamente o evento somado quando a curtida foi criada
         db.session.delete(existing_like)
+        remove_project_event(project.id, LIKE_WEIGHT, existing_like.created_at)
         liked = False
     else:
         # Like
-        like = Like(user_id=current_user.id, project_id=project.id)
+        like = Like(user_id=current_user.id, project_id=project.id, created_at=datetime.utcnow())
         db.session.add(like)
         liked = True
+        add_project_event(project.id, LIKE_WEIGHT, like.created_at)
         
         # Create notification for project owner
         if project.user_id != current_user.id:
@@ -457,91 +526,96 @@ def toggle_like(id):
     })
 
 # Categories
-@app.route('/admin/categories')
+@bp.route('/admin/categories')
 @login_required
 def manage_categories():
     if not current_user.is_admin:
         flash('Acesso negado. Apenas administradores podem gerenciar categorias.', 'error')
-        return redirect(url_for('index'))
-    categories = Category.query.all()
+        return redirect(url_for('main.index'))
+    categories = get_categories()
     return render_template('admin_categories.html', categories=categories)
 
-@app.route('/admin/category/new', methods=['GET', 'POST'])
+@bp.route('/admin/category/new', methods=['GET', 'POST'])
 @login_required
 def new_category():
     if not current_user.is_admin:
         flash('Acesso negado. Apenas administradores podem criar categorias.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     form = CategoryForm()
     if form.validate_on_submit():
         category = Category(name=form.name.data, color=form.color.data)
         db.session.add(category)
+        invalidate_categories()
         db.session.commit()
         flash('Categoria criada com sucesso!', 'success')
-        return redirect(url_for('manage_categories'))
+        return redirect(url_for('main.manage_categories'))
     return render_template('admin_category_form.html', form=form, title='Nova Categoria')
 
-@app.route('/admin/category/<int:id>/edit', methods=['GET', 'POST'])
+@bp.route('/admin/category/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_category(id):
     if not current_user.is_admin:
         flash('Acesso negado. Apenas administradores podem editar categorias.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     category = Category.query.get_or_404(id)
     form = CategoryForm(obj=category)
     
     if form.validate_on_submit():
         category.name = form.name.data
         category.color = form.color.data
+        invalidate_categories()
         db.session.commit()
         flash('Categoria atualizada com sucesso!', 'success')
-        return redirect(url_for('manage_categories'))
+        return redirect(url_for('main.manage_categories'))
     
     return render_template('admin_category_form.html', form=form, category=category, title='Editar Categoria')
 
-@app.route('/admin/category/<int:id>/delete', methods=['POST'])
+@bp.route('/admin/category/<int:id>/delete', methods=['POST'])
 @login_required
 def delete_category(id):
     if not current_user.is_admin:
         flash('Acesso negado. Apenas administradores podem excluir categorias.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     category = Category.query.get_or_404(id)
     
     # Check if category has projects
     if category.projects:
         flash('Não é possível excluir uma categoria que possui projetos.', 'error')
-        return redirect(url_for('manage_categories'))
+        return redirect(url_for('main.manage_categories'))
     
     db.session.delete(category)
+    invalidate_categories()
     db.session.commit()
     flash('Categoria excluída com sucesso!', 'success')
-    return redirect(url_for('manage_categories'))
+    return redirect(url_for('main.manage_categories'))
 
 # Error handlers
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def not_found_error(error):
     return render_template('404.html'), 404
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return render_template('500.html'), 500
 
 # User public profile
-@app.route('/user/<username>')
+@bp.route('/user/<username>')
+@use_replica
 def user_profile(username):
     user = User.query.filter_by(username=username).first_or_404()
-    user_projects = Project.query.filter_by(user_id=user.id, is_published=True).order_by(Project.created_at.desc()).all()
+    user_projects = Project.query.filter_by(user_id=user.id, is_published=True).order_by(Project.popularity_score.desc().nullslast()).all()
     return render_template('user_profile.html', user=user, user_projects=user_projects)
 
 # Search functionality
-@app.route('/search')
+@bp.route('/search')
+@use_replica
 def search():
     query = request.args.get('q', '').strip()
     page = request.args.get('page', 1, type=int)
     
     if not query:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     # Search in projects
     projects = Project.query.filter(
@@ -0,0 +1,86 @@
+from flask import Response, current_app, g, get_flashed_messages, render_template, stream_template
+from flask_wtf.csrf import generate_csrf
+from markupsafe import Markup
+
+# Marca emitida por {{ stream_flush() }}: tudo o que o template gerou até
+# ali é enviado ao cliente de uma vez. Fora do modo streaming vira ''
+FLUSH_MARKER = Markup('<!--flush-->')
+
+class Streaming:
+    """
+    HTML em streaming (opcional): cabeçalho e navegação saem antes das partes
+    lentas da página, que são calculadas só quando o template chega nelas
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('STREAM_TEMPLATES', False)
+        app.jinja_env.globals['stream_flush'] = stream_flush
+        app.extensions['streaming'] = self
+
+def stream_flush():
+    return FLUSH_MARKER if g.get('_streaming') else ''
+
+class Deferred:
+    """
+    Valor calculado na primeira vez que o template o usa, e só uma vez.
+    Funciona como texto, booleano ou sequência, conforme o valor
+    """
+    __slots__ = ('_func', '_value', '_loaded')
+
+    def __init__(self, func):
+        self._func = func
+        self._loaded = False
+
+    def get(self):
+        if not self._loaded:
+            self._value = self._func()
+            self._loaded = True
+        return self._value
+
+    def __bool__(self):
+        return bool(self.get())
+
+    def __str__(self):
+        value = self.get()
+        return '' if value is None else str(value)
+
+    def __iter__(self):
+        return iter(self.get() or ())
+
+    def __len__(self):
+        return len(self.get() or ())
+
+def _buffered(chunks):
+    """
+    Junta os pedaços gerados pelo Jinja e só repassa ao servidor nas marcas
+    de flush e no fim, em vez de uma escrita por expressão do template
+    """
+    buffer = []
+    for chunk in chunks:
+        if chunk == FLUSH_MARKER:
+            if buffer:
+                yield ''.join(buffer)
+                buffer = []
+            continue
+        buffer.append(chunk)
+    if buffer:
+        yield ''.join(buffer)
+
+def render_page(template_name: str, **context):
+    """
+    render_template, ou stream_template com STREAM_TEMPLATES ligado
+    """
+    if not current_app.config['STREAM_TEMPLATES']:
+        return render_template(template_name, **context)
+
+    # Os headers (e o cookie de sessão) saem antes do corpo: o que o template
+    # gravaria na sessão precisa acontecer agora. As mensagens flash ficam
+    # guardadas na requisição e o template recebe as mesmas
+    generate_csrf()
+    get_flashed_messages(with_categories=True)
+    g._streaming = True
+    return Response(_buffered(stream_template(template_name, **context)), mimetype='text/html')
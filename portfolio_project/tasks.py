@@ -0,0 +1,11 @@
+from app import db
+from jobs import task
+from models import Notification
+
+# Tarefas executadas pelo worker (`flask jobs worker`). Recebem só valores
+# serializáveis em JSON e não fazem commit: quem chama (a requisição ou o
+# worker) decide quando gravar
+
+@task('send_notification')
+def send_notification(user_id, message, project_id=None):
+    db.session.add(Notification(user_id=user_id, message=message, project_id=project_id))
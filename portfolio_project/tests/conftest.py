@@ -0,0 +1,105 @@
+import base64
+import json
+import os
+import tempfile
+from pathlib import Path
+import pytest
+
+# Banco, orçamento do GitHub e bytecode dos templates em uma pasta temporária:
+# os testes nunca tocam em instance/. Precisa vir antes de importar o app,
+# porque alguns módulos leem o ambiente na importação
+_tmp = tempfile.mkdtemp(prefix='portfolio-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'default.db')}"
+os.environ['GITHUB_BUDGET_PATH'] = os.path.join(_tmp, 'github_budget.db')
+os.environ['GITHUB_BUDGET_CAPACITY'] = '100000'
+os.environ['JINJA_BYTECODE_CACHE_DIR'] = ''
+os.environ.pop('GITHUB_WEBHOOK_SECRET', None)
+
+from app import create_app, db  # noqa: E402
+
+PAYLOADS = Path(__file__).parent / 'payloads'
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """
+    Caches em memória são do processo: sem limpar, um teste veria o do outro
+    """
+    from cache import _stamps
+    from fragments import fragment_cache
+    from github_api import repo_cache
+    from popularity import _ranking_cache
+    from user_cache import _user_cache
+    for cache in (_stamps, fragment_cache, repo_cache, _ranking_cache, _user_cache):
+        cache.clear()
+    yield
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+    })
+    with app.app_context():
+        import models  # noqa: F401
+        db.create_all()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def payload():
+    """
+    Payload gravado do GitHub (tests/payloads/<nome>.json), em bytes
+    """
+    def load(name: str) -> bytes:
+        return (PAYLOADS / f'{name}.json').read_bytes()
+    return load
+
+class FakeResponse:
+    def __init__(self, status_code: int, data=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = {}
+
+    def json(self):
+        return self._data
+
+class FakeGitHub:
+    """
+    Substitui requests.get no cliente do GitHub. Repositórios e READMEs vêm
+    de dicionários; tudo o que não estiver neles responde 404
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.repos = {}
+        self.readmes = {}
+        self.status = {}  # url -> status forçado (ex.: 503)
+
+    def __call__(self, url, **kwargs):
+        self.calls.append(url)
+        if url in self.status:
+            return FakeResponse(self.status[url])
+        name = url.split('/repos/EdGomes234/')[-1].split('/')[0]
+        if url.endswith('/readme'):
+            if name not in self.readmes:
+                return FakeResponse(404, {'message': 'Not Found'})
+            content = base64.b64encode(self.readmes[name].encode('utf-8')).decode('ascii')
+            return FakeResponse(200, {'content': content})
+        if name in self.repos:
+            return FakeResponse(200, self.repos[name])
+        return FakeResponse(404, {'message': 'Not Found'})
+
+@pytest.fixture
+def github(monkeypatch, payload):
+    import github_api
+    fake = FakeGitHub()
+    fake.repos['Spectra'] = json.loads(payload('repository'))['repository']
+    monkeypatch.setattr(github_api.requests, 'get', fake)
+    return fake
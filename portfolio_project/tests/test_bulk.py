@@ -0,0 +1,33 @@
+import pytest
+from app import db
+from bulk import generate_projects, import_records
+from models import Project, User
+
+@pytest.fixture
+def author(app):
+    user = User(username='edgar', email='edgar@example.com', first_name='Edgar', last_name='Gomes')
+    user.set_password('senha')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def test_generated_projects_import_once(author):
+    records = list(generate_projects(20, 'edgar', [], seed=1))
+    assert import_records('projects', records, chunk_size=7) == (20, 20)
+    # Sem id no arquivo: (autor, título) identifica o que já foi importado
+    assert import_records('projects', records, chunk_size=7) == (0, 20)
+    assert Project.query.count() == 20
+
+def test_duplicates_inside_the_file_are_skipped(author):
+    record = next(generate_projects(1, 'edgar', []))
+    assert import_records('projects', [record, dict(record)]) == (1, 2)
+
+def test_records_with_ids_import_once(author):
+    records = [dict(record, id=100 + n) for n, record in enumerate(generate_projects(3, 'edgar', []))]
+    assert import_records('projects', records) == (3, 3)
+    assert import_records('projects', records) == (0, 3)
+    assert sorted(project.id for project in Project.query) == [100, 101, 102]
+
+def test_unknown_author_is_skipped(author):
+    records = list(generate_projects(2, 'ninguem', []))
+    assert import_records('projects', records) == (0, 2)
@@ -0,0 +1,99 @@
+import threading
+import time
+import sqlalchemy as sa
+from app import create_app, db
+from models import Category
+
+def category_names():
+    return sorted(db.session.scalars(sa.select(Category.name)))
+
+def in_thread(app, target, *args):
+    errors = []
+    def run():
+        with app.app_context():
+            try:
+                target(*args)
+            except Exception as error:
+                errors.append(error)
+                db.session.rollback()
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, errors
+
+def test_tuning_is_enabled(app):
+    assert db.session.execute(sa.text('PRAGMA journal_mode')).scalar() == 'wal'
+    assert db.engine.sqlite_writer is not None
+
+def test_concurrent_writers_are_serialized(app):
+    writing = threading.Event()
+    timeline = []
+
+    def first():
+        db.session.add(Category(name='primeira'))
+        db.session.flush()
+        writing.set()
+        # Segura a vaga de escrita; a outra thread tem que esperar
+        time.sleep(0.2)
+        timeline.append('first-commit')
+        db.session.commit()
+
+    def second():
+        writing.wait(5)
+        category_names()  # leitura antes da escrita, como numa requisição
+        db.session.add(Category(name='segunda'))
+        db.session.flush()
+        timeline.append('second-write')
+        db.session.commit()
+
+    threads = [in_thread(app, first), in_thread(app, second)]
+    for thread, errors in threads:
+        thread.join(10)
+        assert errors == []
+    assert timeline == ['first-commit', 'second-write']
+    assert category_names() == ['primeira', 'segunda']
+
+def test_stale_read_can_still_write(app, tmp_path):
+    # Outro app no mesmo arquivo faz o papel de outro worker (outra fila)
+    other = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI']})
+    category_names()  # transação de leitura aberta antes da escrita do outro
+
+    def other_worker():
+        db.session.add(Category(name='outro-worker'))
+        db.session.commit()
+
+    thread, errors = in_thread(other, other_worker)
+    thread.join(10)
+    assert errors == []
+    # Sem trocar a leitura por BEGIN IMMEDIATE, o SQLite recusaria esta escrita
+    db.session.add(Category(name='este-worker'))
+    db.session.commit()
+    assert category_names() == ['este-worker', 'outro-worker']
+
+def test_acquire_keeps_earlier_writes_in_the_transaction(app):
+    # text() não passa pelos eventos do ORM: a fila só entra no flush seguinte
+    db.session.execute(sa.text("INSERT INTO category (name, color) VALUES ('texto', '#000000')"))
+    db.session.add(Category(name='orm'))
+    db.session.flush()
+    db.session.rollback()
+    # O COMMIT da troca de transação não pode ter confirmado o INSERT
+    assert category_names() == []
+
+def test_acquire_then_commit_keeps_everything(app):
+    db.session.execute(sa.text("INSERT INTO category (name, color) VALUES ('texto', '#000000')"))
+    db.session.add(Category(name='orm'))
+    db.session.commit()
+    assert category_names() == ['orm', 'texto']
+
+def test_many_threads_lose_no_writes(app):
+    count = 8
+
+    def write(n):
+        category_names()
+        db.session.add(Category(name=f'c{n}'))
+        db.session.commit()
+
+    threads = [in_thread(app, write, n) for n in range(count)]
+    for thread, errors in threads:
+        thread.join(10)
+        assert errors == []
+    assert len(category_names()) == count
@@ -0,0 +1,42 @@
+import time
+from cache import SharedTTLCache
+from github_api import create_github_client, repo_cache
+
+def test_shared_cache_between_processes(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    # Dois objetos no mesmo arquivo fazem o papel de dois workers
+    first = SharedTTLCache('github', path=path, ttl=60)
+    second = SharedTTLCache('github', path=path, ttl=60)
+    first.set(('edgomes234', 'repo', 'spectra', 0), {'name': 'Spectra'})
+    assert second.get(('edgomes234', 'repo', 'spectra', 0)) == {'name': 'Spectra'}
+    assert second.get(('edgomes234', 'repo', 'spectra', 1)) is None
+    first.delete(('edgomes234', 'repo', 'spectra', 0))
+    assert not first.contains(('edgomes234', 'repo', 'spectra', 0))
+
+def test_expired_values_are_stale_only(tmp_path):
+    cache = SharedTTLCache('github', path=str(tmp_path / 'shared.db'), ttl=60)
+    cache.set('key', [1, 2], ttl=0.01)
+    time.sleep(0.02)
+    cache._local.clear()
+    assert cache.get('key') is None
+    assert cache.get_stale('key') == [1, 2]
+
+def test_local_copy_expires_with_shared_value(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    writer = SharedTTLCache('github', path=path, ttl=60)
+    reader = SharedTTLCache('github', path=path, ttl=60, local_ttl=60)
+    writer.set('key', 'value', ttl=0.05)
+    assert reader.get('key') == 'value'
+    time.sleep(0.06)
+    assert reader.get('key') is None
+
+def test_other_worker_reuses_fetched_repository(app, github):
+    client = create_github_client()
+    assert client.get_repository('Spectra')['name'] == 'Spectra'
+    assert client.get_readme_html('Spectra') is None
+    assert len(github.calls) == 2
+    # Outro worker: cache local vazio, mesmo arquivo compartilhado
+    repo_cache._local.clear()
+    assert create_github_client().get_repository('Spectra')['name'] == 'Spectra'
+    assert create_github_client().get_readme_parts('Spectra') == {'source': None, 'html': None}
+    assert len(github.calls) == 2
@@ -0,0 +1,124 @@
+import threading
+from datetime import datetime, timedelta
+import sqlalchemy as sa
+import pytest
+from flask import current_app
+from app import db
+from jobs import claim_job, enqueue, run_job, task
+from models import Job
+
+calls = []
+
+@task(name='test_record')
+def record(value):
+    calls.append(value)
+
+@task(name='test_explode', max_attempts=2)
+def explode():
+    raise ValueError('falhou de propósito')
+
+@pytest.fixture
+def app(app):
+    app.config['JOBS_ENABLED'] = True
+    calls.clear()
+    return app
+
+def make_abandoned(job_id):
+    """
+    Como se o worker tivesse morrido há mais que o tempo de visibilidade
+    """
+    timeout = current_app.config['JOB_VISIBILITY_TIMEOUT']
+    db.session.execute(sa.update(Job).where(Job.id == job_id).values(
+        locked_at=datetime.utcnow() - timedelta(seconds=timeout + 1)))
+    db.session.commit()
+
+def test_enqueue_then_run(app):
+    enqueue('test_record', value=1)
+    db.session.commit()
+    job = claim_job('worker-a')
+    assert (job.status, job.attempts, job.locked_by) == ('running', 1, 'worker-a')
+    assert run_job(job) is True
+    assert calls == [1]
+    assert job.status == 'done' and job.locked_by is None
+    assert claim_job('worker-a') is None
+
+def test_delayed_job_waits(app):
+    enqueue('test_record', delay=60, value=1)
+    db.session.commit()
+    assert claim_job('worker-a') is None
+
+def test_concurrent_workers_claim_each_job_once(app):
+    for n in range(20):
+        enqueue('test_record', value=n)
+    db.session.commit()
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(name):
+        with app.app_context():
+            while (job := claim_job(name)) is not None:
+                with lock:
+                    claimed.append(job.id)
+
+    threads = [threading.Thread(target=worker, args=(f'worker-{n}',)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert sorted(claimed) == sorted(db.session.scalars(sa.select(Job.id)))
+    assert db.session.scalar(sa.select(sa.func.max(Job.attempts))) == 1
+
+def test_running_job_is_not_claimed_again(app):
+    enqueue('test_record', value=1)
+    db.session.commit()
+    assert claim_job('worker-a') is not None
+    assert claim_job('worker-b') is None
+
+def test_abandoned_job_is_reclaimed(app):
+    enqueue('test_record', value=1)
+    db.session.commit()
+    job_id = claim_job('worker-a').id
+    make_abandoned(job_id)
+    job = claim_job('worker-b')
+    assert (job.id, job.attempts, job.locked_by) == (job_id, 2, 'worker-b')
+
+def test_abandoned_job_without_attempts_left_fails(app):
+    enqueue('test_explode')
+    db.session.commit()
+    for worker in ('worker-a', 'worker-b'):
+        job_id = claim_job(worker).id
+        make_abandoned(job_id)
+    # Duas tentativas derrubaram o worker: a terceira não acontece
+    assert claim_job('worker-c') is None
+    job = db.session.get(Job, job_id)
+    db.session.refresh(job)
+    assert (job.status, job.attempts, job.locked_by) == ('failed', 2, None)
+    assert 'tentativas esgotadas' in job.last_error
+
+def test_failing_job_retries_then_fails(app):
+    enqueue('test_explode')
+    db.session.commit()
+    job = claim_job('worker-a')
+    assert run_job(job) is False
+    assert job.status == 'queued' and job.run_at > datetime.utcnow()
+    assert 'falhou de propósito' in job.last_error
+    # Antecipa o backoff para não esperar
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    job = claim_job('worker-a')
+    assert run_job(job) is False
+    assert (job.status, job.attempts) == ('failed', 2)
+    assert claim_job('worker-a') is None
+
+def test_retry_command_requeues(app):
+    enqueue('test_explode')
+    db.session.commit()
+    job = claim_job('worker-a')
+    job.attempts = job.max_attempts
+    run_job(job)
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=['jobs', 'retry', str(job.id)]).exit_code == 0
+    db.session.refresh(job)
+    assert (job.status, job.attempts) == ('queued', 0)
+    result = runner.invoke(args=['jobs', 'retry', '999'])
+    assert result.exit_code != 0 and 'não encontrado' in result.output
@@ -0,0 +1,111 @@
+import math
+from datetime import datetime, timedelta
+import sqlalchemy as sa
+import pytest
+from app import db
+from models import Comment, Like, Project, RepositoryStats, User
+from popularity import (CREATED_WEIGHT, COMMENT_WEIGHT, LIKE_WEIGHT, HALF_LIFE_DAYS, add_event,
+                        add_project_event, backfill_scores, remove_event)
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+def test_half_life():
+    # O mesmo peso HALF_LIFE_DAYS depois vale o dobro na escala da pontuação
+    later = NOW + timedelta(days=HALF_LIFE_DAYS)
+    assert add_event(None, 1, later) - add_event(None, 1, NOW) == pytest.approx(math.log(2))
+
+def test_add_is_order_independent():
+    events = [(LIKE_WEIGHT, NOW), (COMMENT_WEIGHT, NOW - timedelta(days=30)), (1, NOW + timedelta(hours=1))]
+    forward = backward = None
+    for weight, when in events:
+        forward = add_event(forward, weight, when)
+    for weight, when in reversed(events):
+        backward = add_event(backward, weight, when)
+    assert forward == pytest.approx(backward, abs=1e-12)
+
+@pytest.mark.parametrize('age_days', [0, 1, 30, 365])
+def test_remove_reverses_add(age_days):
+    score = add_event(None, CREATED_WEIGHT, NOW - timedelta(days=400))
+    score = add_event(score, COMMENT_WEIGHT, NOW - timedelta(days=2))
+    when = NOW - timedelta(days=age_days)
+    assert remove_event(add_event(score, LIKE_WEIGHT, when), LIKE_WEIGHT, when) == pytest.approx(score, abs=1e-9)
+
+def test_remove_never_goes_below_other_events():
+    score = add_event(None, CREATED_WEIGHT, NOW)
+    # Um evento que nunca foi somado não pode zerar o impulso de criação
+    assert remove_event(score, CREATED_WEIGHT * 2, NOW) == score
+    assert remove_event(None, LIKE_WEIGHT, NOW) is None
+
+@pytest.fixture
+def users(app):
+    owner = User(username='dono', email='dono@example.com', first_name='Dono', last_name='Projeto')
+    fan = User(username='fa', email='fa@example.com', first_name='Fa', last_name='Leitor')
+    for user in (owner, fan):
+        user.set_password('senha-segura')
+    db.session.add_all([owner, fan])
+    db.session.commit()
+    return owner, fan
+
+def score_of(project_id):
+    return db.session.scalar(sa.select(Project.popularity_score).where(Project.id == project_id))
+
+def test_unlike_restores_score(client, users):
+    owner, fan = users
+    project = Project(title='Projeto', description='Descrição', user_id=owner.id, is_published=True)
+    db.session.add(project)
+    db.session.commit()
+    project_id, before = project.id, project.popularity_score
+
+    client.post('/login', data={'email': 'fa@example.com', 'password': 'senha-segura'})
+    for _ in range(5):
+        assert client.post(f'/project/{project_id}/like').json['liked'] is True
+        assert score_of(project_id) > before
+        assert client.post(f'/project/{project_id}/like').json['liked'] is False
+        assert score_of(project_id) == pytest.approx(before, abs=1e-9)
+
+def test_backfill_orders_by_decayed_popularity_nulls_last(users):
+    owner, fan = users
+    old = Project(title='Antigo', description='x', user_id=owner.id, created_at=NOW - timedelta(days=60))
+    busy = Project(title='Movimentado', description='x', user_id=owner.id, created_at=NOW - timedelta(days=60))
+    new = Project(title='Novo', description='x', user_id=owner.id, created_at=NOW)
+    db.session.add_all([old, busy, new])
+    db.session.flush()
+    when = NOW - timedelta(days=1)
+    db.session.add_all([
+        Comment(content='oi', user_id=fan.id, project_id=busy.id, created_at=when),
+        Like(user_id=fan.id, project_id=busy.id, created_at=when),
+    ])
+    # Como em add_comment e toggle_like
+    add_project_event(busy.id, COMMENT_WEIGHT, when)
+    add_project_event(busy.id, LIKE_WEIGHT, when)
+    db.session.commit()
+    expected = {project.id: score_of(project.id) for project in (old, busy, new)}
+    # Como uma coluna recém-adicionada: tudo NULL até o backfill
+    db.session.execute(sa.update(Project).values(popularity_score=None))
+    db.session.commit()
+
+    assert backfill_scores(batch_size=2) == 3
+    assert backfill_scores() == 0
+    # O backfill chega à mesma pontuação que os eventos ao vivo teriam dado
+    scores = {project.id: project.popularity_score for project in Project.query}
+    assert scores == pytest.approx(expected)
+    assert scores[busy.id] > scores[old.id]
+
+    ghost = Project(title='Sem pontuação', description='x', user_id=owner.id)
+    db.session.add(ghost)
+    db.session.commit()
+    db.session.execute(sa.update(Project).where(Project.id == ghost.id).values(popularity_score=None))
+    ordered = [project.title for project in
+               Project.query.order_by(Project.popularity_score.desc().nullslast())]
+    # Um mês de idade pesa mais que uma curtida e um comentário
+    assert ordered == ['Novo', 'Movimentado', 'Antigo', 'Sem pontuação']
+
+def test_repository_ranking_puts_nulls_last(app):
+    from popularity import get_repository_ranking
+    db.session.add_all([
+        RepositoryStats(key='edgomes234/sem-dados', view_count=0, popularity_score=None),
+        RepositoryStats(key='edgomes234/pouco', view_count=1, popularity_score=add_event(None, 1, NOW)),
+        RepositoryStats(key='edgomes234/muito', view_count=9, popularity_score=add_event(None, 9, NOW)),
+    ])
+    db.session.commit()
+    assert get_repository_ranking() == {'edgomes234/muito': 0, 'edgomes234/pouco': 1, 'edgomes234/sem-dados': 2}
@@ -0,0 +1,58 @@
+import sqlalchemy as sa
+import pytest
+from app import db
+from cache import _stamps, bump_stamp, get_stamp
+from models import User
+from user_cache import invalidate_user, load_user_snapshot, user_stamp_key
+
+@pytest.fixture
+def user(app):
+    user = User(username='ana', email='ana@example.com', first_name='Ana', last_name='Souza')
+    user.set_password('senha-antiga')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def other_worker(user_id, **values):
+    """
+    Mudança feita por outro worker: grava no banco e incrementa a versão
+    compartilhada, sem tocar no cache de usuários deste processo
+    """
+    db.session.execute(sa.update(User).where(User.id == user_id).values(**values))
+    bump_stamp(user_stamp_key(user_id))
+    db.session.commit()
+    # Este worker relê os CacheStamp quando o cache deles expira
+    _stamps.clear()
+
+def test_snapshot_is_cached(user):
+    session_id = user.get_id()
+    first = load_user_snapshot(session_id)
+    assert first.first_name == 'Ana'
+    db.session.execute(sa.update(User).where(User.id == user.id).values(first_name='Outra'))
+    # Sem nova versão compartilhada o snapshot em cache continua valendo
+    assert load_user_snapshot(session_id) is first
+
+def test_profile_edit_in_other_worker_is_seen(user):
+    session_id = user.get_id()
+    assert load_user_snapshot(session_id).first_name == 'Ana'
+    other_worker(user.id, first_name='Ana Maria')
+    assert load_user_snapshot(session_id).first_name == 'Ana Maria'
+
+def test_password_change_in_other_worker_ends_session(user):
+    session_id = user.get_id()
+    assert load_user_snapshot(session_id) is not None
+    other_worker(user.id, session_version=User.session_version + 1)
+    assert load_user_snapshot(session_id) is None
+
+def test_set_password_bumps_shared_version(user):
+    session_id = user.get_id()
+    assert load_user_snapshot(session_id) is not None
+    user.set_password('senha-nova')
+    db.session.commit()
+    assert load_user_snapshot(session_id) is None
+    assert load_user_snapshot(user.get_id()) is not None
+
+def test_invalidate_user_bumps_stamp(user):
+    invalidate_user(user.id)
+    db.session.commit()
+    assert get_stamp(user_stamp_key(user.id)) >= 1
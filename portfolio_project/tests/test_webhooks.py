@@ -0,0 +1,99 @@
+import json
+from urllib.parse import urlencode
+import pytest
+from cache import get_stamp
+from github_api import repository_stamp_key
+from webhooks import sign_payload, verify_signature
+
+SECRET = 'test-secret'
+STAMP = repository_stamp_key('EdGomes234', 'Spectra')
+
+@pytest.fixture
+def app(app):
+    app.config['GITHUB_WEBHOOK_SECRET'] = SECRET
+    return app
+
+def deliver(client, event, body, content_type='application/json', secret=SECRET):
+    return client.post('/webhooks/github', data=body, headers={
+        'Content-Type': content_type,
+        'X-GitHub-Event': event,
+        'X-Hub-Signature-256': sign_payload(secret, body),
+    })
+
+def test_verify_signature():
+    body = b'{"zen": "x"}'
+    assert verify_signature(SECRET, body, sign_payload(SECRET, body))
+    assert not verify_signature(SECRET, body, sign_payload('other', body))
+    assert not verify_signature(SECRET, body + b' ', sign_payload(SECRET, body))
+    assert not verify_signature(SECRET, body, '')
+
+def test_disabled_without_secret(client, app, payload):
+    app.config['GITHUB_WEBHOOK_SECRET'] = None
+    # O handler de 404 do site renderiza um template de página; aqui basta o status
+    app.register_error_handler(404, lambda error: ('', 404))
+    assert deliver(client, 'push', payload('push')).status_code == 404
+
+def test_rejects_bad_signature(client, payload):
+    response = deliver(client, 'push', payload('push'), secret='wrong')
+    assert response.status_code == 403
+    assert get_stamp(STAMP) == 0
+
+def test_ping(client, payload):
+    response = deliver(client, 'ping', payload('ping'))
+    assert response.status_code == 200
+    assert response.json == {'status': 'pong'}
+
+def test_ignores_unhandled_events(client, payload):
+    response = deliver(client, 'issues', payload('ping'))
+    assert response.status_code == 202
+    assert response.json['status'] == 'ignored'
+
+def test_star_stores_repository_without_api_calls(client, github, payload):
+    response = deliver(client, 'star', payload('star'))
+    assert response.json == {'status': 'ok', 'event': 'star', 'repository': 'Spectra'}
+    assert get_stamp(STAMP) == 1
+    # O payload já traz o repositório: nenhuma chamada à API
+    assert github.calls == []
+    from github_api import create_github_client
+    assert create_github_client().get_repository('Spectra')['stargazers_count'] == 9
+
+def test_push_refreshes_repository_and_readme(client, github, payload):
+    github.readmes['Spectra'] = '# Spectra\n\nNovo README'
+    response = deliver(client, 'push', payload('push'))
+    assert response.status_code == 200
+    assert get_stamp(STAMP) == 1
+    assert [url.rsplit('/', 1)[-1] for url in github.calls] == ['Spectra', 'readme']
+    from github_api import create_github_client
+    assert 'Novo README' in create_github_client().get_readme_html('Spectra')
+    assert len(github.calls) == 2
+
+def test_form_encoded_delivery(client, github, payload):
+    body = urlencode({'payload': payload('repository').decode('utf-8')}).encode('ascii')
+    response = deliver(client, 'repository', body, content_type='application/x-www-form-urlencoded')
+    assert response.status_code == 200
+    assert response.json['repository'] == 'Spectra'
+
+@pytest.mark.parametrize('body', [b'not json', b'[1, 2]', b'payload=%7Bbroken'])
+def test_signed_invalid_body_is_400(client, body):
+    assert deliver(client, 'push', body).status_code == 400
+    content_type = 'application/x-www-form-urlencoded'
+    assert deliver(client, 'push', body, content_type=content_type).status_code == 400
+
+def test_payload_without_repository_is_400(client):
+    assert deliver(client, 'push', json.dumps({'ref': 'refs/heads/main'}).encode()).status_code == 400
+
+def test_replay_webhook_command(app, github, payload, tmp_path):
+    path = tmp_path / 'star.json'
+    path.write_bytes(payload('star'))
+    result = app.test_cli_runner().invoke(args=['replay-webhook', str(path), '--event', 'star'])
+    assert result.exit_code == 0, result.output
+    assert result.output.startswith('200 ')
+    assert get_stamp(STAMP) == 1
+
+def test_replay_webhook_requires_secret(app, payload, tmp_path):
+    app.config['GITHUB_WEBHOOK_SECRET'] = None
+    path = tmp_path / 'ping.json'
+    path.write_bytes(payload('ping'))
+    result = app.test_cli_runner().invoke(args=['replay-webhook', str(path), '--event', 'ping'])
+    assert result.exit_code != 0
+    assert 'GITHUB_WEBHOOK_SECRET' in result.output
@@ -0,0 +1,178 @@
+import os
+import time
+import random
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from flask import current_app, request
+
+# Limite de tentativas de login/cadastro em janelas deslizantes, por IP e
+# por conta. A checagem acontece antes de calcular o hash da senha: uma rajada
+# de tentativas é recusada sem gastar CPU
+
+SCOPE_IP = 'ip'
+SCOPE_ACCOUNT = 'account'
+
+class MemoryStore:
+    """
+    Janelas em memória, por processo. Com N workers o limite efetivo é até
+    N vezes maior; use o store 'sqlite' para um limite compartilhado
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _window(self, key, window, now):
+        hits = self._hits.get(key)
+        if hits is None:
+            return None
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        return hits
+
+    def hit(self, key: str, window: float):
+        now = time.time()
+        with self._lock:
+            hits = self._window(key, window, now)
+            if hits is None:
+                hits = self._hits[key] = deque()
+                # Muitas chaves (ex.: varredura de IPs): descarta as mais antigas
+                while len(self._hits) > self.max_keys:
+                    self._hits.popitem(last=False)
+            hits.append(now)
+            self._hits.move_to_end(key)
+
+    def state(self, key: str, window: float):
+        """
+        (tentativas na janela, horário da mais antiga)
+        """
+        with self._lock:
+            hits = self._window(key, window, time.time())
+            if not hits:
+                return 0, None
+            return len(hits), hits[0]
+
+    def reset(self, key: str):
+        with self._lock:
+            self._hits.pop(key, None)
+
+class SQLiteStore:
+    """
+    Janelas compartilhadas entre os workers em um arquivo SQLite, como o
+    orçamento do GitHub (github_budget.py)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS hits (key TEXT NOT NULL, ts REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_hits_key_ts ON hits (key, ts)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def hit(self, key: str, window: float):
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute('DELETE FROM hits WHERE key = ? AND ts <= ?', (key, now - window))
+            connection.execute('INSERT INTO hits (key, ts) VALUES (?, ?)', (key, now))
+            # De vez em quando limpa chaves abandonadas (janela máxima: 1 dia)
+            if random.random() < 0.01:
+                connection.execute('DELETE FROM hits WHERE ts <= ?', (now - 86400,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def state(self, key: str, window: float):
+        row = self._connection().execute(
+            'SELECT COUNT(*), MIN(ts) FROM hits WHERE key = ? AND ts > ?', (key, time.time() - window)
+        ).fetchone()
+        return row[0], row[1]
+
+    def reset(self, key: str):
+        self._connection().execute('DELETE FROM hits WHERE key = ?', (key,))
+
+class LoginThrottle:
+    """
+    Limites de tentativas de login e cadastro:
+        LOGIN_IP_LIMIT em LOGIN_IP_WINDOW segundos, por IP (todas as tentativas)
+        LOGIN_ACCOUNT_LIMIT em LOGIN_ACCOUNT_WINDOW segundos, por conta (só falhas)
+    """
+
+    def __init__(self, app=None):
+        self.store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LOGIN_THROTTLE_ENABLED', True)
+        app.config.setdefault('LOGIN_THROTTLE_STORE', 'memory')
+        app.config.setdefault('LOGIN_THROTTLE_PATH', os.path.join('instance', 'login_throttle.db'))
+        app.config.setdefault('LOGIN_IP_LIMIT', 20)
+        app.config.setdefault('LOGIN_IP_WINDOW', 300)
+        app.config.setdefault('LOGIN_ACCOUNT_LIMIT', 5)
+        app.config.setdefault('LOGIN_ACCOUNT_WINDOW', 900)
+
+        if app.config['LOGIN_THROTTLE_STORE'] == 'sqlite':
+            self.store = SQLiteStore(app.config['LOGIN_THROTTLE_PATH'])
+        else:
+            self.store = MemoryStore()
+        app.extensions['login_throttle'] = self
+
+    def _limits(self, scope):
+        config = current_app.config
+        if scope == SCOPE_IP:
+            return config['LOGIN_IP_LIMIT'], config['LOGIN_IP_WINDOW']
+        return config['LOGIN_ACCOUNT_LIMIT'], config['LOGIN_ACCOUNT_WINDOW']
+
+    def retry_after(self, action: str, account: str = None) -> int:
+        """
+        Segundos até uma nova tentativa ser aceita (0 = liberado)
+        """
+        if not current_app.config['LOGIN_THROTTLE_ENABLED']:
+            return 0
+        from metrics import record_login_throttled
+
+        checks = [(SCOPE_IP, ip_key(action))]
+        if account:
+            checks.append((SCOPE_ACCOUNT, account_key(account)))
+        wait = 0
+        for scope, key in checks:
+            limit, window = self._limits(scope)
+            count, oldest = self.store.state(key, window)
+            if count >= limit:
+                wait = max(wait, int(oldest + window - time.time()) + 1)
+                record_login_throttled(scope)
+        return wait
+
+    def record_attempt(self, action: str):
+        if current_app.config['LOGIN_THROTTLE_ENABLED']:
+            self.store.hit(ip_key(action), self._limits(SCOPE_IP)[1])
+
+    def record_failure(self, account: str):
+        if current_app.config['LOGIN_THROTTLE_ENABLED']:
+            self.store.hit(account_key(account), self._limits(SCOPE_ACCOUNT)[1])
+
+    def reset_account(self, account: str):
+        if current_app.config['LOGIN_THROTTLE_ENABLED']:
+            self.store.reset(account_key(account))
+
+def ip_key(action: str) -> str:
+    return f"{action}:ip:{request.remote_addr}"
+
+def account_key(account: str) -> str:
+    return f"login:account:{account.strip().lower()}"
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,80 @@
+import os
+from flask_login import UserMixin
+from cache import TTLCache, bump_stamp, get_stamp
+
+# A chave inclui a versão compartilhada do usuário (CacheStamp): edição de
+# perfil e troca de senha a incrementam e todos os workers recarregam o
+# usuário em até CACHE_STAMP_TTL segundos. USER_CACHE_TTL é só o teto
+_user_cache = TTLCache('users', ttl=float(os.environ.get('USER_CACHE_TTL', 60)), maxsize=4096)
+
+SNAPSHOT_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name',
+                   'profile_image', 'is_admin', 'session_version')
+
+class UserSnapshot(UserMixin):
+    """
+    Versão enxuta e imutável do usuário logado, usada como current_user.
+    Rotas que alteram o usuário carregam o objeto User completo do banco
+    """
+    __slots__ = SNAPSHOT_FIELDS
+
+    def __init__(self, **fields):
+        for name in SNAPSHOT_FIELDS:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"UserSnapshot é somente leitura ({name})")
+
+    def get_id(self):
+        return make_session_id(self.id, self.session_version)
+
+    def get_full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+def make_session_id(user_id, session_version) -> str:
+    """
+    Identificador guardado na sessão: id do usuário + versão da sessão
+    """
+    return f"{user_id}:{session_version or 0}"
+
+def parse_session_id(session_id: str):
+    """
+    Separa id e versão; sessões antigas guardavam só o id (versão 0)
+    """
+    user_id, _, version = str(session_id).partition(':')
+    return int(user_id), int(version or 0)
+
+def load_user_snapshot(session_id: str):
+    """
+    Carrega o usuário da sessão, consultando o banco só no miss do cache
+    """
+    try:
+        user_id, version = parse_session_id(session_id)
+    except ValueError:
+        return None
+
+    def load():
+        from app import db
+        from models import User
+        columns = [getattr(User, name) for name in SNAPSHOT_FIELDS]
+        row = db.session.query(*columns).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        return UserSnapshot(**dict(zip(SNAPSHOT_FIELDS, row)))
+
+    key = (user_id, version, get_stamp(user_stamp_key(user_id)))
+    snapshot = _user_cache.get_or_set(key, load)
+    # Senha trocada (ou usuário removido): a sessão antiga deixa de valer
+    if snapshot is None or (snapshot.session_version or 0) != version:
+        return None
+    return snapshot
+
+def user_stamp_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def invalidate_user(user_id: int):
+    """
+    Incrementa a versão compartilhada do usuário na sessão atual (vale para
+    os outros workers depois do commit) e limpa o cache deste worker
+    """
+    bump_stamp(user_stamp_key(user_id))
+    _user_cache.delete_matching(lambda key: key[0] == user_id)
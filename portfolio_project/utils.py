@@ -3,7 +3,10 @@ import uuid
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from app import db
-from models import Notification
+from models import Tag
+from jobs import enqueue
+import tasks  # noqa: F401  (registra as tarefas)
+from reference_data import get_tag_ids, invalidate_tags
 
 def save_uploaded_file(file, subfolder=''):
     """
@@ -30,15 +33,40 @@ def save_uploaded_file(file, subfolder=''):
 
 def create_notification(user_id, message, project_id=None):
     """
-    Cria uma notificação para um usuário
+    Cria uma notificação para um usuário. Com JOBS_ENABLED vai para a fila
+    e é gravada pelo worker, fora da requisição
     """
-    notification = Notification(
-        user_id=user_id,
-        message=message,
-        project_id=project_id
-    )
-    db.session.add(notification)
-    return notification
+    return enqueue('send_notification', user_id=user_id, message=message, project_id=project_id)
+
+def get_or_create_tags(tag_names):
+    """
+    Resolve nomes de tags em objetos Tag com no máximo duas consultas,
+    criando as que ainda não existem
+    """
+    # Remove repetidas mantendo a ordem
+    tag_names = list(dict.fromkeys(name for name in tag_names if name))
+    if not tag_names:
+        return []
+    
+    known_ids = get_tag_ids()
+    ids = [known_ids[name] for name in tag_names if name in known_ids]
+    tags = {tag.name: tag for tag in Tag.query.filter(Tag.id.in_(ids))} if ids else {}
+    
+    # O cache pode estar um pouco atrasado: confere no banco antes de criar
+    missing = [name for name in tag_names if name not in tags]
+    if missing:
+        tags.update({tag.name: tag for tag in Tag.query.filter(Tag.name.in_(missing))})
+    
+    created = False
+    for name in tag_names:
+        if name not in tags:
+            tags[name] = Tag(name=name)
+            db.session.add(tags[name])
+            created = True
+    if created:
+        invalidate_tags()
+    
+    return [tags[name] for name in tag_names]
 
 def format_date(date):
     """
@@ -0,0 +1,110 @@
+import hashlib
+import hmac
+import json
+from urllib.parse import parse_qs
+import click
+from flask import Blueprint, abort, current_app, jsonify, request
+from app import csrf, db
+from cache import bump_stamp
+from github_api import create_github_client, repository_stamp_key
+from github_budget import PRIORITY_BACKGROUND
+
+bp = Blueprint('webhooks', __name__)
+
+HANDLED_EVENTS = {'push', 'repository', 'star'}
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """
+    Assinatura no formato do header X-Hub-Signature-256
+    """
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+def verify_signature(secret: str, body: bytes, signature: str) -> bool:
+    """
+    Confere a assinatura HMAC enviada pelo GitHub em tempo constante
+    """
+    if not signature:
+        return False
+    return hmac.compare_digest(sign_payload(secret, body), signature)
+
+def parse_payload(body: bytes, mimetype: str):
+    """
+    Payload do webhook em JSON puro ou no formato de formulário do GitHub
+    (payload=<json>). None se o corpo não for um objeto JSON válido
+    """
+    try:
+        if mimetype == 'application/x-www-form-urlencoded':
+            body = parse_qs(body.decode('utf-8')).get('payload', [''])[0]
+        payload = json.loads(body or '{}')
+    except (UnicodeDecodeError, ValueError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+def handle_repository_event(event: str, payload: dict) -> str:
+    """
+    Invalida (ou atualiza) só os dados do repositório afetado.
+    Retorna o nome do repositório tratado
+    """
+    repository = payload.get('repository') or {}
+    owner = (repository.get('owner') or {}).get('login')
+    repo_name = repository.get('name')
+    if not owner or not repo_name:
+        abort(400)
+
+    # Nova versão compartilhada: todos os workers (e caches que dependem
+    # dela) deixam de usar os dados antigos
+    bump_stamp(repository_stamp_key(owner, repo_name))
+    db.session.commit()
+
+    # Eventos star/repository trazem o repositório completo; já deixamos o
+    # cache deste worker preenchido sem chamar a API. Em push o README pode
+    # ter mudado: buscamos de novo com prioridade de segundo plano, que não
+    # disputa a reserva das requisições de usuários
+    if event in ('star', 'repository') and 'stargazers_count' in repository:
+        create_github_client(owner).store_repository(repository)
+    elif event == 'push':
+        create_github_client(owner, priority=PRIORITY_BACKGROUND).refresh_repository(repo_name)
+
+    return repo_name
+
+@bp.route('/webhooks/github', methods=['POST'])
+@csrf.exempt
+def github_webhook():
+    secret = current_app.config.get('GITHUB_WEBHOOK_SECRET')
+    if not secret:
+        abort(404)
+
+    body = request.get_data()
+    if not verify_signature(secret, body, request.headers.get('X-Hub-Signature-256', '')):
+        abort(403)
+
+    event = request.headers.get('X-GitHub-Event', '')
+    if event == 'ping':
+        return jsonify({'status': 'pong'})
+    if event not in HANDLED_EVENTS:
+        return jsonify({'status': 'ignored', 'event': event}), 202
+
+    payload = parse_payload(body, request.mimetype)
+    if payload is None:
+        abort(400)
+    repo_name = handle_repository_event(event, payload)
+    current_app.logger.info(f"Webhook {event} recebido para {repo_name}")
+    return jsonify({'status': 'ok', 'event': event, 'repository': repo_name})
+
+@click.command('replay-webhook')
+@click.argument('payload_file', type=click.File('rb'))
+@click.option('--event', required=True, type=click.Choice(sorted(HANDLED_EVENTS | {'ping'})))
+def replay_webhook_command(payload_file, event):
+    """Reenvia um payload gravado do GitHub para o webhook local, assinado."""
+    secret = current_app.config.get('GITHUB_WEBHOOK_SECRET')
+    if not secret:
+        raise click.ClickException('Defina GITHUB_WEBHOOK_SECRET para assinar o payload.')
+
+    body = payload_file.read()
+    client = current_app.test_client()
+    response = client.post('/webhooks/github', data=body, headers={
+        'Content-Type': 'application/json',
+        'X-GitHub-Event': event,
+        'X-Hub-Signature-256': sign_payload(secret, body),
+    })
+    click.echo(f'{response.status_code} {response.get_data(as_text=True).strip()}')